@@ -1,3 +1,4 @@
+import asyncio
 from typing import Dict, List, Optional
 
 from pydantic import Field, model_validator
@@ -130,12 +131,16 @@ class Manus(ToolCallAgent):
 
     async def cleanup(self):
         """Clean up Manus agent resources."""
-        if self.browser_context_helper:
-            await self.browser_context_helper.cleanup_browser()
-        # Disconnect from all MCP servers only if we were initialized
-        if self._initialized:
-            await self.disconnect_mcp_server()
-            self._initialized = False
+        # Tool cleanups (the browser included) run in the background while MCP
+        # servers disconnect; MCP transports hold anyio cancel scopes entered in
+        # this task, so they must be exited from this task
+        tools_task = asyncio.create_task(super().cleanup())
+        try:
+            if self._initialized:
+                await self.disconnect_mcp_server()
+                self._initialized = False
+        finally:
+            await tools_task
 
     async def think(self) -> bool:
         """Process current state and decide next actions with appropriate context."""
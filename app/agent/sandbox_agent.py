@@ -1,3 +1,4 @@
+import asyncio
 from typing import Dict, List, Optional
 
 from pydantic import Field, model_validator
@@ -187,13 +188,36 @@ class SandboxManus(ToolCallAgent):
 
     async def cleanup(self):
         """Clean up Manus agent resources."""
-        if self.browser_context_helper:
-            await self.browser_context_helper.cleanup_browser()
-        # Disconnect from all MCP servers only if we were initialized
-        if self._initialized:
-            await self.disconnect_mcp_server()
-            await self.delete_sandbox(self.sandbox.id if self.sandbox else "unknown")
-            self._initialized = False
+        initialized = self._initialized
+
+        async def release_sandbox() -> None:
+            # Tools (the browser included) still talk to the sandbox while they
+            # clean up, so delete it only after they are done
+            await super(SandboxManus, self).cleanup()
+            if initialized:
+                await self.delete_sandbox(
+                    self.sandbox.id if self.sandbox else "unknown"
+                )
+
+        # Tools and the sandbox are released in the background while MCP servers
+        # disconnect; MCP transports hold anyio cancel scopes entered in this
+        # task, so they must be exited from this task
+        sandbox_task = asyncio.create_task(release_sandbox())
+        errors = []
+        if initialized:
+            try:
+                await self.disconnect_mcp_server()
+            except Exception as e:
+                errors.append(e)
+        try:
+            await sandbox_task
+        except Exception as e:
+            errors.append(e)
+        for error in errors[1:]:
+            logger.error(f"Error during agent cleanup: {error}")
+        if errors:
+            raise errors[0]
+        self._initialized = False
 
     async def think(self) -> bool:
         """Process current state and decide next actions with appropriate context."""
@@ -78,13 +78,9 @@ class ToolCallAgent(ReActAgent):
 
         # Log response info
         logger.info(f"✨ {self.name} 的思考: {content}")
-        logger.info(
-            f"🛠️ {self.name} 选择了 {len(tool_calls) if tool_calls else 0} 个工具"
-        )
+        logger.info(f"🛠️ {self.name} 选择了 {len(tool_calls) if tool_calls else 0} 个工具")
         if tool_calls:
-            logger.info(
-                f"🧰 准备使用的工具: {[call.function.name for call in tool_calls]}"
-            )
+            logger.info(f"🧰 准备使用的工具: {[call.function.name for call in tool_calls]}")
             logger.info(f"🔧 工具参数: {tool_calls[0].function.arguments}")
 
         try:
@@ -151,9 +147,7 @@ class ToolCallAgent(ReActAgent):
             if self.max_observe:
                 result = result[: self.max_observe]
 
-            logger.info(
-                f"🎯 工具 '{command.function.name}' 完成了任务! 结果: {result}"
-            )
+            logger.info(f"🎯 工具 '{command.function.name}' 完成了任务! 结果: {result}")
 
             # Add tool response to memory
             tool_msg = Message.tool_message(
@@ -238,17 +232,25 @@ class ToolCallAgent(ReActAgent):
     async def cleanup(self):
         """Clean up resources used by the agent's tools."""
         logger.info(f"🧹 正在清理代理 '{self.name}' 的资源...")
-        for tool_name, tool_instance in self.available_tools.tool_map.items():
-            if hasattr(tool_instance, "cleanup") and asyncio.iscoroutinefunction(
-                tool_instance.cleanup
-            ):
-                try:
-                    logger.debug(f"🧼 Cleaning up tool: {tool_name}")
-                    await tool_instance.cleanup()
-                except Exception as e:
-                    logger.error(
-                        f"🚨 Error cleaning up tool '{tool_name}': {e}", exc_info=True
-                    )
+
+        async def cleanup_tool(tool_name: str, tool_instance) -> None:
+            try:
+                logger.debug(f"🧼 Cleaning up tool: {tool_name}")
+                await tool_instance.cleanup()
+            except Exception as e:
+                logger.error(
+                    f"🚨 Error cleaning up tool '{tool_name}': {e}", exc_info=True
+                )
+
+        # Tools own independent resources, so release them concurrently
+        await asyncio.gather(
+            *(
+                cleanup_tool(tool_name, tool_instance)
+                for tool_name, tool_instance in self.available_tools.tool_map.items()
+                if hasattr(tool_instance, "cleanup")
+                and asyncio.iscoroutinefunction(tool_instance.cleanup)
+            )
+        )
         logger.info(f"✨ Cleanup complete for agent '{self.name}'.")
 
     async def run(self, request: Optional[str] = None) -> str:
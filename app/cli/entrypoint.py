@@ -0,0 +1,90 @@
+"""Shared command-line entrypoint for running an agent with a single prompt."""
+
+import argparse
+import asyncio
+import importlib
+from typing import TYPE_CHECKING, Dict, Optional, Union
+
+from app.logger import logger
+
+
+try:
+    import uvloop
+except ImportError:  # optional, and not available on Windows
+    uvloop = None
+
+if TYPE_CHECKING:
+    from app.agent.base import BaseAgent
+
+
+DEFAULT_MESSAGES: Dict[str, str] = {
+    "prompt": "Enter your prompt: ",
+    "empty": "Empty prompt provided.",
+    "processing": "Processing your request...",
+    "completed": "Request processing completed.",
+    "interrupted": "Operation interrupted.",
+}
+
+
+def load_agent_class(agent: Union[str, type["BaseAgent"]]) -> type["BaseAgent"]:
+    """Resolve an agent given as a class or as a "module:ClassName" string."""
+    if not isinstance(agent, str):
+        return agent
+    module_name, _, class_name = agent.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+async def run_agent(
+    agent_cls: type["BaseAgent"],
+    prompt: str,
+    messages: Optional[Dict[str, str]] = None,
+) -> None:
+    """Create an agent and run it on the prompt.
+
+    The agent's run() cleans up after itself (ToolCallAgent.run does so in a
+    finally), so cleanup is not invoked a second time here.
+    """
+    messages = {**DEFAULT_MESSAGES, **(messages or {})}
+
+    # Create and initialize the agent
+    agent = await agent_cls.create()
+    try:
+        logger.warning(messages["processing"])
+        await agent.run(prompt)
+        logger.info(messages["completed"])
+    except KeyboardInterrupt:
+        logger.warning(messages["interrupted"])
+
+
+def run(
+    agent: Union[str, type["BaseAgent"]], messages: Optional[Dict[str, str]] = None
+) -> None:
+    """Read the prompt from the command line or stdin, then run the agent on it.
+
+    The prompt is read before the agent is imported when agent is given as a
+    "module:ClassName" string, so an empty or interrupted prompt exits without
+    paying for the agent's (heavy) imports.
+    """
+    messages = {**DEFAULT_MESSAGES, **(messages or {})}
+
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(description="Run Manus agent with a prompt")
+    parser.add_argument(
+        "--prompt", type=str, required=False, help="Input prompt for the agent"
+    )
+    args = parser.parse_args()
+
+    # Use command line prompt if provided, otherwise ask for input
+    try:
+        prompt = args.prompt if args.prompt else input(messages["prompt"])
+    except KeyboardInterrupt:
+        logger.warning(messages["interrupted"])
+        return
+    if not prompt.strip():
+        logger.warning(messages["empty"])
+        return
+
+    asyncio.run(
+        run_agent(load_agent_class(agent), prompt, messages),
+        loop_factory=uvloop.new_event_loop if uvloop else None,
+    )
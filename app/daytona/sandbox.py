@@ -1,3 +1,4 @@
+import asyncio
 import time
 
 from daytona import (
@@ -153,10 +154,10 @@ async def delete_sandbox(sandbox_id: str):
 
     try:
         # Get the sandbox
-        sandbox = daytona.get(sandbox_id)
+        sandbox = await asyncio.to_thread(daytona.get, sandbox_id)
 
         # Delete the sandbox
-        daytona.delete(sandbox)
+        await asyncio.to_thread(daytona.delete, sandbox)
 
         logger.info(f"Successfully deleted sandbox {sandbox_id}")
         return True
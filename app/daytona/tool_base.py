@@ -1,3 +1,4 @@
+import asyncio
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, ClassVar, Dict, Optional
@@ -62,6 +63,7 @@ class SandboxToolsBase(BaseTool):
     _sandbox_pass: Optional[str] = None
     workspace_path: str = Field(default="/workspace", exclude=True)
     _sessions: dict[str, str] = {}
+    _locks: dict[str, asyncio.Lock] = {}
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
@@ -128,6 +130,13 @@ class SandboxToolsBase(BaseTool):
             )
         return self._sandbox_id
 
+    def _get_lock(self, key: str) -> asyncio.Lock:
+        """Get the lock serializing operations on one resource (a file, a session)."""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
     def clean_path(self, path: str) -> str:
         """Clean and normalize a path to be relative to /workspace."""
         cleaned_path = clean_path(path, self.workspace_path)
@@ -241,6 +241,28 @@ class SandboxManager:
 
         logger.info("Manager cleanup completed")
 
+    async def reset(self) -> None:
+        """Deletes all sandboxes while keeping the manager usable.
+
+        Unlike cleanup(), the manager can keep creating sandboxes afterwards;
+        the automatic cleanup task is restarted if cleanup() had stopped it.
+        """
+        async with self._global_lock:
+            sandbox_ids = list(self._sandboxes.keys())
+
+        await asyncio.gather(
+            *(self._safe_delete_sandbox(sandbox_id) for sandbox_id in sandbox_ids)
+        )
+
+        self._sandboxes.clear()
+        self._last_used.clear()
+        self._locks.clear()
+        self._active_operations.clear()
+
+        if self._is_shutting_down:
+            self._is_shutting_down = False
+            self.start_cleanup_task()
+
     async def _safe_delete_sandbox(self, sandbox_id: str) -> None:
         """Safely deletes a single sandbox.
 
@@ -1,3 +1,5 @@
+from typing import ClassVar
+
 from app.tool import BaseTool
 
 
@@ -6,7 +8,7 @@ class AskHuman(BaseTool):
 
     name: str = "ask_human"
     description: str = "当你需要向用户（真人）提问以获得额外信息时使用此工具。"
-    parameters: str = {
+    parameters: ClassVar[dict] = {
         "type": "object",
         "properties": {
             "inquire": {
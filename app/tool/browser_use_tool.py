@@ -531,7 +531,9 @@ Page content:
             }
 
             return ToolResult(
-                output=json.dumps(state_info, indent=4, ensure_ascii=False),
+                output=json.dumps(
+                    state_info, ensure_ascii=False, separators=(",", ":")
+                ),
                 base64_image=screenshot,
             )
         except Exception as e:
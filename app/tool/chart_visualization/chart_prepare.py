@@ -1,3 +1,5 @@
+from typing import ClassVar
+
 from app.tool.chart_visualization.python_execute import NormalPythonExecute
 
 
@@ -8,7 +10,7 @@ class VisualizationPrepare(NormalPythonExecute):
     description: str = (
         "使用 Python 代码生成 `data_visualization` 工具所需的元数据。输出：1）JSON 信息；2）清洗后的 CSV 数据文件（可选）。"
     )
-    parameters: dict = {
+    parameters: ClassVar[dict] = {
         "type": "object",
         "properties": {
             "code_type": {
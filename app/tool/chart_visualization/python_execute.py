@@ -1,3 +1,5 @@
+from typing import ClassVar
+
 from app.config import config
 from app.tool.python_execute import PythonExecute
 
@@ -9,7 +11,7 @@ class NormalPythonExecute(PythonExecute):
     description: str = (
         """执行 Python 代码，用于深入数据分析 / 数据报告（任务结论）/ 其他不直接做可视化的常规任务。"""
     )
-    parameters: dict = {
+    parameters: ClassVar[dict] = {
         "type": "object",
         "properties": {
             "code_type": {
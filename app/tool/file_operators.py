@@ -1,6 +1,8 @@
 """File operation interfaces and implementations for local and sandbox environments."""
 
 import asyncio
+import os
+import shlex
 from pathlib import Path
 from typing import Optional, Protocol, Tuple, Union, runtime_checkable
 
@@ -32,6 +34,16 @@ class FileOperator(Protocol):
         """Check if path exists."""
         ...
 
+    async def stat(self, path: PathLike) -> Optional[os.stat_result]:
+        """Stat a path, returning None if it does not exist."""
+        ...
+
+    async def list_tree(
+        self, path: PathLike, maxdepth: int = 2, exclude_hidden: bool = True
+    ) -> str:
+        """List a directory and its entries up to maxdepth levels, one per line."""
+        ...
+
     async def run_command(
         self, cmd: str, timeout: Optional[float] = 120.0
     ) -> Tuple[int, str, str]:
@@ -66,6 +78,47 @@ class LocalFileOperator(FileOperator):
         """Check if path exists."""
         return Path(path).exists()
 
+    async def stat(self, path: PathLike) -> Optional[os.stat_result]:
+        """Stat a local path, returning None if it does not exist."""
+        try:
+            return await asyncio.to_thread(os.stat, path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    async def list_tree(
+        self, path: PathLike, maxdepth: int = 2, exclude_hidden: bool = True
+    ) -> str:
+        """List a local directory tree in-process, in the same layout as find."""
+        try:
+            return await asyncio.to_thread(
+                self._list_tree, str(path), maxdepth, exclude_hidden
+            )
+        except OSError as e:
+            raise ToolError(f"Failed to list {path}: {str(e)}") from None
+
+    @staticmethod
+    def _list_tree(root: str, maxdepth: int, exclude_hidden: bool) -> str:
+        lines = [root]
+
+        def walk(directory: str, depth: int) -> None:
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                if depth == 0:
+                    raise
+                return  # Skip unreadable subdirectories, as find does
+            with entries:
+                for entry in entries:
+                    if exclude_hidden and entry.name.startswith("."):
+                        continue
+                    child = os.path.join(directory, entry.name)
+                    lines.append(child)
+                    if depth + 1 < maxdepth and entry.is_dir(follow_symlinks=False):
+                        walk(child, depth + 1)
+
+        walk(root, 0)
+        return "\n".join(lines) + "\n"
+
     async def run_command(
         self, cmd: str, timeout: Optional[float] = 120.0
     ) -> Tuple[int, str, str]:
@@ -136,6 +189,36 @@ class SandboxFileOperator(FileOperator):
         )
         return result.strip() == "true"
 
+    async def stat(self, path: PathLike) -> Optional[os.stat_result]:
+        """Stat a path in sandbox with one command, returning None if missing.
+
+        Only st_mode, st_size and st_mtime are filled in.
+        """
+        await self._ensure_sandbox_initialized()
+        result = await self.sandbox_client.run_command(
+            f"stat -L -c '%f %s %Y' {shlex.quote(str(path))} 2>/dev/null"
+        )
+        fields = result.strip().split()
+        if len(fields) != 3:
+            return None
+        try:
+            mode, size, mtime = int(fields[0], 16), int(fields[1]), int(fields[2])
+        except ValueError:
+            return None
+        return os.stat_result((mode, 0, 0, 0, 0, 0, size, 0, mtime, 0))
+
+    async def list_tree(
+        self, path: PathLike, maxdepth: int = 2, exclude_hidden: bool = True
+    ) -> str:
+        """List a directory tree in sandbox with find."""
+        cmd = f"find {shlex.quote(str(path))} -maxdepth {int(maxdepth)}"
+        if exclude_hidden:
+            cmd += " -not -path '*/\\.*'"
+        # find exits nonzero when it skips unreadable entries; keep what it did
+        # list and report the errors after it
+        _, stdout, stderr = await self.run_command(cmd)
+        return stdout + stderr
+
     async def run_command(
         self, cmd: str, timeout: Optional[float] = 120.0
     ) -> Tuple[int, str, str]:
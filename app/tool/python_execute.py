@@ -1,19 +1,96 @@
+import asyncio
+import builtins
 import multiprocessing
-import sys
+from contextlib import redirect_stdout
+from functools import lru_cache
 from io import StringIO
-from typing import Dict
+from multiprocessing.connection import Connection
+from types import CodeType
+from typing import ClassVar, Dict, List, Optional
 
 from app.tool.base import BaseTool
 
 
+# 只在模块加载时构建一次，worker 进程通过 fork/导入直接复用。
+# 必须是真正的 dict：用 MappingProxyType 时 exec 里的 import 会抛 SystemError。
+# 这是 builtins 模块字典的拷贝；每次执行再各自拷贝一份（见 _run_code），
+# 用户代码改写 __builtins__ 既影响不到 worker 自身，也影响不到后续调用。
+_SAFE_BUILTINS: dict = dict(builtins.__dict__)
+
+
+@lru_cache(maxsize=128)
+def _compile_code(code: str) -> tuple[CodeType, bool]:
+    """Compile code once, as an expression if possible; returns (code_obj, is_expr)."""
+    try:
+        return compile(code, "<string>", "eval"), True
+    except SyntaxError:
+        # 如果是语句而不是表达式，按 exec 模式编译
+        return compile(code, "<string>", "exec"), False
+
+
+def _run_code(code: str) -> tuple[str, bool]:
+    """Run code inside a pool worker and return (observation, success)."""
+    safe_globals = {"__builtins__": dict(_SAFE_BUILTINS)}
+    output_buffer = StringIO()
+    try:
+        code_obj, is_expr = _compile_code(code)
+        with redirect_stdout(output_buffer):
+            if not is_expr:
+                exec(code_obj, safe_globals, safe_globals)
+                return output_buffer.getvalue(), True
+            # 表达式直接 eval，捕获返回值
+            result = eval(code_obj, safe_globals)
+            output = output_buffer.getvalue()
+            # 如果没有 print 输出但有返回值，显示返回值
+            if not output and result is not None:
+                output = repr(result)
+            return output, True
+    except BaseException as e:
+        # 包括 SystemExit，避免用户代码带走常驻 worker
+        return str(e), False
+
+
+def _worker_loop(conn: Connection) -> None:
+    """Long-lived worker: run each received code string and send back the result."""
+    while True:
+        try:
+            code = conn.recv()
+        except EOFError:
+            # 父进程关闭了管道，worker 退出
+            return
+        conn.send(_run_code(code))
+
+
+class _Worker:
+    """A persistent worker process talking to the tool over a pipe."""
+
+    def __init__(self):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_worker_loop, args=(child_conn,), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def call(self, code: str, timeout: float) -> tuple[str, bool]:
+        """Run code in this worker; raises TimeoutError or EOFError (worker died)."""
+        self.conn.send(code)
+        if not self.conn.poll(timeout):
+            raise TimeoutError
+        return self.conn.recv()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
 class PythonExecute(BaseTool):
     """A tool for executing Python code with timeout and safety restrictions."""
 
     name: str = "python_execute"
-    description: str = (
-        "执行一段 Python 代码字符串。支持两种模式：1) 如果代码是表达式，会自动返回表达式的值；2) 如果代码包含 print 语句，会显示 print 的输出。"
-    )
-    parameters: dict = {
+    description: str = "执行一段 Python 代码字符串。支持两种模式：1) 如果代码是表达式，会自动返回表达式的值；2) 如果代码包含 print 语句，会显示 print 的输出。"
+    parameters: ClassVar[dict] = {
         "type": "object",
         "properties": {
             "code": {
@@ -24,31 +101,9 @@ class PythonExecute(BaseTool):
         "required": ["code"],
     }
 
-    def _run_code(self, code: str, result_dict: dict, safe_globals: dict) -> None:
-        original_stdout = sys.stdout
-        try:
-            output_buffer = StringIO()
-            sys.stdout = output_buffer
-
-            # 尝试用 eval 捕获表达式的返回值
-            try:
-                result = eval(code, safe_globals)
-                output = output_buffer.getvalue()
-                # 如果没有 print 输出但有返回值，显示返回值
-                if not output and result is not None:
-                    output = repr(result)
-                result_dict["observation"] = output
-            except SyntaxError:
-                # 如果是语句而不是表达式，使用 exec
-                exec(code, safe_globals, safe_globals)
-                result_dict["observation"] = output_buffer.getvalue()
-
-            result_dict["success"] = True
-        except Exception as e:
-            result_dict["observation"] = str(e)
-            result_dict["success"] = False
-        finally:
-            sys.stdout = original_stdout
+    max_workers: int = 1
+    _idle_workers: List[_Worker] = None
+    _slots: Optional[asyncio.Semaphore] = None
 
     async def execute(
         self,
@@ -58,6 +113,11 @@ class PythonExecute(BaseTool):
         """
         Executes the provided Python code with a timeout.
 
+        Code runs in persistent worker processes that are reused across calls,
+        so process-wide state such as the working directory, sys.modules and
+        environment variables persists from one call to the next in a worker.
+        Globals and builtins are fresh for every call.
+
         Args:
             code (str): The Python code to execute.
             timeout (int): Execution timeout in seconds.
@@ -65,25 +125,39 @@ class PythonExecute(BaseTool):
         Returns:
             Dict: Contains 'output' with execution output or error message and 'success' status.
         """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+            self._idle_workers = []
 
-        with multiprocessing.Manager() as manager:
-            result = manager.dict({"observation": "", "success": False})
-            if isinstance(__builtins__, dict):
-                safe_globals = {"__builtins__": __builtins__}
-            else:
-                safe_globals = {"__builtins__": __builtins__.__dict__.copy()}
-            proc = multiprocessing.Process(
-                target=self._run_code, args=(code, result, safe_globals)
-            )
-            proc.start()
-            proc.join(timeout)
-
-            # timeout process
-            if proc.is_alive():
-                proc.terminate()
-                proc.join(1)
+        # 排队等待 worker 的时间不计入 timeout
+        async with self._slots:
+            worker = self._idle_workers.pop() if self._idle_workers else _Worker()
+            try:
+                observation, success = await asyncio.to_thread(
+                    worker.call, code, timeout
+                )
+            except TimeoutError:
+                # 超时的代码无法中断，只杀掉运行它的那个 worker
+                worker.kill()
                 return {
                     "observation": f"Execution timeout after {timeout} seconds",
                     "success": False,
                 }
-            return dict(result)
+            except (EOFError, OSError):
+                worker.kill()
+                return {
+                    "observation": "Worker process died unexpectedly",
+                    "success": False,
+                }
+            except BaseException:
+                # 调用被取消等情况下 worker 状态未知，直接丢弃
+                worker.kill()
+                raise
+            self._idle_workers.append(worker)
+        return {"observation": observation, "success": success}
+
+    async def cleanup(self):
+        """Stop the idle worker processes."""
+        workers, self._idle_workers = self._idle_workers or [], []
+        for worker in workers:
+            worker.kill()
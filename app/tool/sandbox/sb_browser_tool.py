@@ -1,10 +1,14 @@
+import asyncio
 import base64
+import functools
 import io
 import json
+import logging
+import struct
 import traceback
-from typing import Optional  # Add this import for Optional
+from typing import ClassVar, Optional
 
-from PIL import Image
+import httpx
 from pydantic import Field
 
 from app.daytona.tool_base import (  # Ensure Sandbox is imported correctly
@@ -15,7 +19,71 @@ from app.daytona.tool_base import (  # Ensure Sandbox is imported correctly
 from app.tool.base import ToolResult
 from app.utils.logger import logger
 
+
+try:
+    # orjson parses the long screenshot_base64 strings noticeably faster
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+
+@functools.cache
+def _lazy_pil():
+    """Import PIL.Image on first screenshot validation rather than at module load."""
+    from PIL import Image
+
+    return Image
+
+
+def _header_dimensions(header: bytes) -> Optional[tuple[int, int]]:
+    """Read (width, height) from a PNG or GIF header, or None for other formats."""
+    if (
+        len(header) >= 24
+        and header[:8] == b"\x89PNG\r\n\x1a\n"
+        and header[12:16] == b"IHDR"
+    ):
+        return struct.unpack(">II", header[16:24])
+    if len(header) >= 10 and header[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", header[6:10])
+    return None
+
+
 # Context = TypeVar("Context")
+# Base64 alphabet; deleting it via bytes.translate leaves only invalid bytes
+_B64_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/="
+# File signatures of the supported screenshot formats
+_IMAGE_MAGIC = (
+    b"\x89PNG\r\n\x1a\n",
+    b"\xff\xd8\xff",
+    b"GIF87a",
+    b"GIF89a",
+    b"BM",
+    b"II*\x00",
+    b"MM\x00*",
+)
+# Fields copied verbatim from the automation API result into the tool response
+_PASSTHROUGH_FIELDS = frozenset(
+    {"url", "title", "element_count", "pixels_below", "ocr_text", "image_url"}
+)
+# action -> (required params, optional params); the action name is also the API endpoint
+_BROWSER_ACTIONS: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    "navigate_to": (("url",), ()),
+    "go_back": ((), ()),
+    "wait": ((), ("seconds",)),
+    "click_element": (("index",), ()),
+    "input_text": (("index", "text"), ()),
+    "send_keys": (("keys",), ()),
+    "switch_tab": (("page_id",), ()),
+    "close_tab": (("page_id",), ()),
+    "scroll_down": ((), ("amount",)),
+    "scroll_up": ((), ("amount",)),
+    "scroll_to_text": (("text",), ()),
+    "get_dropdown_options": (("index",), ()),
+    "select_dropdown_option": (("index", "text"), ()),
+    "click_coordinates": (("x", "y"), ()),
+    "drag_drop": (("element_source", "element_target"), ()),
+}
+
 _BROWSER_DESCRIPTION = """\
 一个基于沙箱的浏览器自动化工具，支持通过多种动作与网页交互。
 * 在沙箱环境中控制浏览器会话
@@ -37,7 +105,7 @@ class SandboxBrowserTool(SandboxToolsBase):
 
     name: str = "sandbox_browser"
     description: str = _BROWSER_DESCRIPTION
-    parameters: dict = {
+    parameters: ClassVar[dict] = {
         "type": "object",
         "properties": {
             "action": {
@@ -125,6 +193,9 @@ class SandboxBrowserTool(SandboxToolsBase):
         },
     }
     browser_message: Optional[ThreadMessage] = Field(default=None, exclude=True)
+    session: Optional[httpx.AsyncClient] = Field(default=None, exclude=True)
+    api_base_url: Optional[str] = Field(default=None, exclude=True)
+    _state_cache: Optional[tuple[ThreadMessage, str]] = None
 
     def __init__(
         self, sandbox: Optional[Sandbox] = None, thread_id: Optional[str] = None, **data
@@ -134,14 +205,31 @@ class SandboxBrowserTool(SandboxToolsBase):
         if sandbox is not None:
             self._sandbox = sandbox  # Directly set the base class private attribute
 
+    async def _get_session(self) -> httpx.AsyncClient:
+        """Get or create the keep-alive client for browser automation requests."""
+        if self.session is None or self.session.is_closed:
+            self.session = httpx.AsyncClient(timeout=30)
+        return self.session
+
+    async def _get_api_base_url(self) -> str:
+        """Resolve the public URL of the sandbox browser automation API."""
+        if self.api_base_url is None:
+            # get_preview_link is a blocking SDK call, keep it off the event loop
+            link = await asyncio.to_thread(self.sandbox.get_preview_link, 8003)
+            self.api_base_url = (
+                link.url if hasattr(link, "url") else str(link)
+            ).rstrip("/")
+        return self.api_base_url
+
     def _validate_base64_image(
-        self, base64_string: str, max_size_mb: int = 10
+        self, base64_string: str, max_size_mb: int = 10, strict: bool = False
     ) -> tuple[bool, str]:
         """
         Validate base64 image data.
         Args:
             base64_string: The base64 encoded image data
             max_size_mb: Maximum allowed image size in megabytes
+            strict: Also run PIL's full integrity check (Image.verify)
         Returns:
             Tuple of (is_valid, error_message)
         """
@@ -153,39 +241,59 @@ class SandboxBrowserTool(SandboxToolsBase):
                     base64_string = base64_string.split(",", 1)[1]
                 except (IndexError, ValueError):
                     return False, "Invalid data URL format"
-            import re
-
-            if not re.match(r"^[A-Za-z0-9+/]*={0,2}$", base64_string):
+            raw = base64_string.encode("ascii", "ignore")
+            if len(raw) != len(base64_string) or raw.translate(None, _B64_ALPHABET):
+                return False, "Invalid base64 characters detected"
+            padding = raw.find(b"=")
+            if padding != -1 and (len(raw) - padding > 2 or raw[padding:].strip(b"=")):
                 return False, "Invalid base64 characters detected"
             if len(base64_string) % 4 != 0:
                 return False, "Invalid base64 string length"
-            try:
-                image_data = base64.b64decode(base64_string, validate=True)
-            except Exception as e:
-                return False, f"Base64 decoding failed: {str(e)}"
+            # Reject oversized payloads before allocating the decoded bytes
             max_size_bytes = max_size_mb * 1024 * 1024
-            if len(image_data) > max_size_bytes:
+            pad_count = len(raw) - padding if padding != -1 else 0
+            decoded_size = len(raw) * 3 // 4 - pad_count
+            if decoded_size > max_size_bytes:
                 return False, f"Image size exceeds limit ({max_size_bytes} bytes)"
-            try:
-                image_stream = io.BytesIO(image_data)
-                with Image.open(image_stream) as img:
-                    img.verify()
-                    supported_formats = {"JPEG", "PNG", "GIF", "BMP", "WEBP", "TIFF"}
-                    if img.format not in supported_formats:
-                        return False, f"Unsupported image format: {img.format}"
-                    image_stream.seek(0)
-                    with Image.open(image_stream) as img_check:
-                        width, height = img_check.size
-                        max_dimension = 8192
-                        if width > max_dimension or height > max_dimension:
-                            return (
-                                False,
-                                f"Image dimensions exceed limit ({max_dimension}x{max_dimension})",
-                            )
-                        if width < 1 or height < 1:
-                            return False, f"Invalid image dimensions: {width}x{height}"
-            except Exception as e:
-                return False, f"Invalid image data: {str(e)}"
+            # PNG/GIF keep their dimensions at a fixed offset, so unless a full
+            # integrity check is requested the first 24 decoded bytes are enough
+            dimensions = (
+                None if strict else _header_dimensions(base64.b64decode(raw[:32]))
+            )
+            if dimensions is not None:
+                width, height = dimensions
+            else:
+                try:
+                    # Characters were already checked above, skip the second validation pass
+                    image_data = base64.b64decode(raw, validate=False)
+                except Exception as e:
+                    return False, f"Base64 decoding failed: {str(e)}"
+                header = image_data[:12]
+                if not header.startswith(_IMAGE_MAGIC) and not (
+                    header.startswith(b"RIFF") and header[8:12] == b"WEBP"
+                ):
+                    return (
+                        False,
+                        "Unsupported image format: unrecognized file signature",
+                    )
+                try:
+                    with _lazy_pil().open(io.BytesIO(image_data)) as img:
+                        fmt, (width, height) = img.format, img.size
+                        if strict:
+                            img.verify()
+                except Exception as e:
+                    return False, f"Invalid image data: {str(e)}"
+                supported_formats = {"JPEG", "PNG", "GIF", "BMP", "WEBP", "TIFF"}
+                if fmt not in supported_formats:
+                    return False, f"Unsupported image format: {fmt}"
+            max_dimension = 8192
+            if width > max_dimension or height > max_dimension:
+                return (
+                    False,
+                    f"Image dimensions exceed limit ({max_dimension}x{max_dimension})",
+                )
+            if width < 1 or height < 1:
+                return False, f"Invalid image dimensions: {width}x{height}"
             return True, "Valid image"
         except Exception as e:
             logger.error(f"Unexpected error during base64 image validation: {e}")
@@ -197,81 +305,68 @@ class SandboxBrowserTool(SandboxToolsBase):
         """Execute a browser automation action through the sandbox API."""
         try:
             await self._ensure_sandbox()
-            url = f"http://localhost:8003/api/automation/{endpoint}"
-            if method == "GET" and params:
-                query_params = "&".join([f"{k}={v}" for k, v in params.items()])
-                url = f"{url}?{query_params}"
-                curl_cmd = (
-                    f"curl -s -X {method} '{url}' -H 'Content-Type: application/json'"
-                )
+            session = await self._get_session()
+            url = f"{await self._get_api_base_url()}/api/automation/{endpoint}"
+            logger.debug(f"Browser automation request: {method} {url}")
+            if method == "GET":
+                response = await session.get(url, params=params)
             else:
-                curl_cmd = (
-                    f"curl -s -X {method} '{url}' -H 'Content-Type: application/json'"
+                response = await session.request(method, url, json=params)
+            body = response.content
+            if response.status_code >= 400:
+                logger.error(
+                    f"Browser automation request failed: HTTP {response.status_code}"
                 )
-                if params:
-                    json_data = json.dumps(params)
-                    curl_cmd += f" -d '{json_data}'"
-            logger.debug(f"Executing curl command: {curl_cmd}")
-            response = self.sandbox.process.exec(curl_cmd, timeout=30)
-            if response.exit_code == 0:
-                try:
-                    result = json.loads(response.result)
-                    result.setdefault("content", "")
-                    result.setdefault("role", "assistant")
-                    if "screenshot_base64" in result:
-                        screenshot_data = result["screenshot_base64"]
-                        is_valid, validation_message = self._validate_base64_image(
-                            screenshot_data
+                return self.fail_response(
+                    f"Browser automation request failed: HTTP {response.status_code} {body.decode(errors='replace')}"
+                )
+            try:
+                result = _json_loads(body)
+                result.setdefault("content", "")
+                result.setdefault("role", "assistant")
+                if "screenshot_base64" in result:
+                    screenshot_data = result["screenshot_base64"]
+                    is_valid, validation_message = self._validate_base64_image(
+                        screenshot_data
+                    )
+                    if not is_valid:
+                        logger.warning(
+                            f"Screenshot validation failed: {validation_message}"
                         )
-                        if not is_valid:
-                            logger.warning(
-                                f"Screenshot validation failed: {validation_message}"
-                            )
-                            result["image_validation_error"] = validation_message
-                            del result["screenshot_base64"]
+                        result["image_validation_error"] = validation_message
+                        del result["screenshot_base64"]
 
-                    # added_message = await self.thread_manager.add_message(
-                    #     thread_id=self.thread_id,
-                    #     type="browser_state",
-                    #     content=result,
-                    #     is_llm_message=False
-                    # )
-                    message = ThreadMessage(
-                        type="browser_state", content=result, is_llm_message=False
-                    )
-                    self.browser_message = message
-                    success_response = {
-                        "success": result.get("success", False),
-                        "message": result.get("message", "Browser action completed"),
-                    }
-                    #         if added_message and 'message_id' in added_message:
-                    #             success_response['message_id'] = added_message['message_id']
-                    for field in [
-                        "url",
-                        "title",
-                        "element_count",
-                        "pixels_below",
-                        "ocr_text",
-                        "image_url",
-                    ]:
-                        if field in result:
-                            success_response[field] = result[field]
-                    return (
-                        self.success_response(success_response)
-                        if success_response["success"]
-                        else self.fail_response(success_response)
-                    )
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse response JSON: {e}")
-                    return self.fail_response(f"Failed to parse response JSON: {e}")
-            else:
-                logger.error(f"Browser automation request failed: {response}")
-                return self.fail_response(
-                    f"Browser automation request failed: {response}"
+                # added_message = await self.thread_manager.add_message(
+                #     thread_id=self.thread_id,
+                #     type="browser_state",
+                #     content=result,
+                #     is_llm_message=False
+                # )
+                message = ThreadMessage(
+                    type="browser_state", content=result, is_llm_message=False
+                )
+                self.browser_message = message
+                success_response = {
+                    "success": result.get("success", False),
+                    "message": result.get("message", "Browser action completed"),
+                }
+                #         if added_message and 'message_id' in added_message:
+                #             success_response['message_id'] = added_message['message_id']
+                success_response.update(
+                    (k, result[k]) for k in _PASSTHROUGH_FIELDS.intersection(result)
+                )
+                return (
+                    self.success_response(success_response)
+                    if success_response["success"]
+                    else self.fail_response(success_response)
                 )
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse response JSON: {e}")
+                return self.fail_response(f"Failed to parse response JSON: {e}")
         except Exception as e:
             logger.error(f"Error executing browser action: {e}")
-            logger.debug(traceback.format_exc())
+            if logger.is_enabled_for(logging.DEBUG):
+                logger.debug(traceback.format_exc())
             return self.fail_response(f"Error executing browser action: {e}")
 
     async def execute(
@@ -310,104 +405,33 @@ class SandboxBrowserTool(SandboxToolsBase):
         """
         # async with self.lock:
         try:
-            # Navigation actions
-            if action == "navigate_to":
-                if not url:
-                    return self.fail_response("URL is required for navigation")
-                return await self._execute_browser_action("navigate_to", {"url": url})
-            elif action == "go_back":
-                return await self._execute_browser_action("go_back", {})
-                # Interaction actions
-            elif action == "click_element":
-                if index is None:
-                    return self.fail_response("Index is required for click_element")
-                return await self._execute_browser_action(
-                    "click_element", {"index": index}
-                )
-            elif action == "input_text":
-                if index is None or not text:
-                    return self.fail_response(
-                        "Index and text are required for input_text"
-                    )
-                return await self._execute_browser_action(
-                    "input_text", {"index": index, "text": text}
-                )
-            elif action == "send_keys":
-                if not keys:
-                    return self.fail_response("Keys are required for send_keys")
-                return await self._execute_browser_action("send_keys", {"keys": keys})
-                # Tab management
-            elif action == "switch_tab":
-                if page_id is None:
-                    return self.fail_response("Page ID is required for switch_tab")
-                return await self._execute_browser_action(
-                    "switch_tab", {"page_id": page_id}
-                )
-            elif action == "close_tab":
-                if page_id is None:
-                    return self.fail_response("Page ID is required for close_tab")
-                return await self._execute_browser_action(
-                    "close_tab", {"page_id": page_id}
-                )
-                # Scrolling actions
-            elif action == "scroll_down":
-                params = {"amount": amount} if amount is not None else {}
-                return await self._execute_browser_action("scroll_down", params)
-            elif action == "scroll_up":
-                params = {"amount": amount} if amount is not None else {}
-                return await self._execute_browser_action("scroll_up", params)
-            elif action == "scroll_to_text":
-                if not text:
-                    return self.fail_response("Text is required for scroll_to_text")
-                return await self._execute_browser_action(
-                    "scroll_to_text", {"text": text}
-                )
-            # Dropdown actions
-            elif action == "get_dropdown_options":
-                if index is None:
-                    return self.fail_response(
-                        "Index is required for get_dropdown_options"
-                    )
-                return await self._execute_browser_action(
-                    "get_dropdown_options", {"index": index}
-                )
-            elif action == "select_dropdown_option":
-                if index is None or not text:
-                    return self.fail_response(
-                        "Index and text are required for select_dropdown_option"
-                    )
-                return await self._execute_browser_action(
-                    "select_dropdown_option", {"index": index, "text": text}
-                )
-                # Coordinate-based actions
-            elif action == "click_coordinates":
-                if x is None or y is None:
-                    return self.fail_response(
-                        "X and Y coordinates are required for click_coordinates"
-                    )
-                return await self._execute_browser_action(
-                    "click_coordinates", {"x": x, "y": y}
-                )
-            elif action == "drag_drop":
-                if not element_source or not element_target:
-                    return self.fail_response(
-                        "Source and target elements are required for drag_drop"
-                    )
-                return await self._execute_browser_action(
-                    "drag_drop",
-                    {
-                        "element_source": element_source,
-                        "element_target": element_target,
-                    },
-                )
-            # Utility actions
-            elif action == "wait":
-                seconds_to_wait = seconds if seconds is not None else 3
-                return await self._execute_browser_action(
-                    "wait", {"seconds": seconds_to_wait}
-                )
-            else:
+            spec = _BROWSER_ACTIONS.get(action)
+            if spec is None:
                 return self.fail_response(f"Unknown action: {action}")
+            required, optional = spec
+            provided = {
+                "url": url,
+                "index": index,
+                "text": text,
+                "amount": amount,
+                "page_id": page_id,
+                "keys": keys,
+                "seconds": seconds,
+                "x": x,
+                "y": y,
+                "element_source": element_source,
+                "element_target": element_target,
+            }
+            missing = [k for k in required if provided[k] is None or provided[k] == ""]
+            if missing:
+                return self.fail_response(
+                    f"Missing required parameter(s) for {action}: {', '.join(missing)}"
+                )
+            params = {k: provided[k] for k in required}
+            params.update((k, provided[k]) for k in optional if provided[k] is not None)
+            if action == "wait":
+                params.setdefault("seconds", 3)
+            return await self._execute_browser_action(action, params)
         except Exception as e:
             logger.error(f"Error executing browser action: {e}")
             return self.fail_response(f"Error executing browser action: {e}")
@@ -426,6 +450,11 @@ class SandboxBrowserTool(SandboxToolsBase):
                 return ToolResult(error="Browser context not initialized")
             state = message.content
             screenshot = state.get("screenshot_base64")
+            # Each browser action produces a new message, so polling the same
+            # state again can reuse the JSON serialized last time
+            cached = self._state_cache
+            if cached is not None and cached[0] is message:
+                return ToolResult(output=cached[1], base64_image=screenshot)
             # Build the state info with all required fields
             state_info = {
                 "url": state.get("url", ""),
@@ -436,13 +465,18 @@ class SandboxBrowserTool(SandboxToolsBase):
                 "help": "[0], [1], [2], etc., represent clickable indices corresponding to the elements listed. Clicking on these indices will navigate to or interact with the respective content behind them.",
             }
 
-            return ToolResult(
-                output=json.dumps(state_info, indent=4, ensure_ascii=False),
-                base64_image=screenshot,
-            )
+            output = json.dumps(state_info, ensure_ascii=False, separators=(",", ":"))
+            self._state_cache = (message, output)
+            return ToolResult(output=output, base64_image=screenshot)
         except Exception as e:
             return ToolResult(error=f"Failed to get browser state: {str(e)}")
 
+    async def cleanup(self):
+        """Clean up resources."""
+        if self.session and not self.session.is_closed:
+            await self.session.aclose()
+            self.session = None
+
     @classmethod
     def create_with_sandbox(cls, sandbox: Sandbox) -> "SandboxBrowserTool":
         """Factory method to create a tool with sandbox."""
@@ -1,4 +1,9 @@
 import asyncio
+import base64
+import posixpath
+import shlex
+import tarfile
+from io import BytesIO
 from typing import Optional, TypeVar
 
 from pydantic import Field
@@ -10,6 +15,22 @@ from app.utils.logger import logger
 
 Context = TypeVar("Context")
 
+# Files larger than this are left out of the workspace state
+_MAX_STATE_FILE_SIZE = 1024 * 1024
+# Leading bytes checked for NUL to detect binary files before decoding
+_BINARY_SNIFF_SIZE = 4096
+# Concurrent downloads when reading the workspace state
+_MAX_CONCURRENT_DOWNLOADS = 20
+# Bounds on one batched (tar) download: total raw bytes and number of files
+_MAX_BATCH_SIZE = 8 * 1024 * 1024
+_MAX_BATCH_FILES = 500
+
+
+def _is_not_found(e: Exception) -> bool:
+    """Check whether a sandbox filesystem error means the path does not exist"""
+    return getattr(e, "status_code", None) == 404 or isinstance(e, FileNotFoundError)
+
+
 _FILES_DESCRIPTION = """\
 一个基于沙箱的文件系统工具，用于在安全隔离环境中对 workspace 进行文件操作。
 * 支持在 workspace 中创建/读取/更新/删除文件
@@ -71,6 +92,7 @@ class SandboxFilesTool(SandboxToolsBase):
         },
     }
     SNIPPET_LINES: int = Field(default=4, exclude=True)
+    _preview_url: Optional[str] = None
     # workspace_path: str = Field(default="/workspace", exclude=True)
     # sandbox: Optional[Sandbox] = Field(default=None, exclude=True)
 
@@ -90,47 +112,111 @@ class SandboxFilesTool(SandboxToolsBase):
         """Check if a file should be excluded based on path, name, or extension"""
         return should_exclude_file(rel_path)
 
-    def _file_exists(self, path: str) -> bool:
-        """Check if a file exists in the sandbox"""
-        try:
-            self.sandbox.fs.get_file_info(path)
-            return True
-        except Exception:
-            return False
+    async def _download_files_batched(self, rel_paths: list[str]) -> dict:
+        """Download several workspace files in one command, as a base64 tar stream"""
+        # pipefail makes a tar failure (e.g. a file deleted since it was listed)
+        # fail the command instead of yielding a partial archive, and tar's
+        # messages are dropped so they cannot end up in the base64 stream
+        script = "set -o pipefail; tar -cf - -- {} 2>/dev/null | base64 -w0".format(
+            " ".join(shlex.quote(p) for p in rel_paths)
+        )
+        command = f"bash -c {shlex.quote(script)}"
+        response = await asyncio.to_thread(
+            self.sandbox.process.exec, command, cwd=self.workspace_path, timeout=60
+        )
+        if response.exit_code != 0:
+            raise RuntimeError(f"tar exited with code {response.exit_code}")
+
+        contents = {}
+        with tarfile.open(fileobj=BytesIO(base64.b64decode(response.result))) as tar:
+            for member in tar:
+                if member.isfile():
+                    contents[member.name] = tar.extractfile(member).read()
+        return contents
 
     async def get_workspace_state(self) -> dict:
         """Get the current workspace state by reading all files"""
-        files_state = {}
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_DOWNLOADS)
+
+        async def read_file(file_info, data: Optional[bytes]) -> Optional[dict]:
+            rel_path = file_info.name
+            try:
+                if data is None:
+                    full_path = f"{self.workspace_path}/{rel_path}"
+                    async with semaphore:
+                        data = await asyncio.to_thread(
+                            self.sandbox.fs.download_file, full_path
+                        )
+                if b"\0" in data[:_BINARY_SNIFF_SIZE]:
+                    logger.debug(f"Skipping binary file: {rel_path}")
+                    return None
+                return {
+                    "content": data.decode(),
+                    "is_dir": file_info.is_dir,
+                    "size": file_info.size,
+                    "modified": file_info.mod_time,
+                }
+            except UnicodeDecodeError:
+                logger.debug(f"Skipping binary file: {rel_path}")
+            except Exception as e:
+                logger.warning(f"Error reading file {rel_path}: {e}")
+            return None
+
         try:
             # Ensure sandbox is initialized
             await self._ensure_sandbox()
 
-            files = self.sandbox.fs.list_files(self.workspace_path)
+            files = await asyncio.to_thread(
+                self.sandbox.fs.list_files, self.workspace_path
+            )
+            to_read = []
             for file_info in files:
-                rel_path = file_info.name
-
                 # Skip excluded files and directories
-                if self._should_exclude_file(rel_path) or file_info.is_dir:
+                if self._should_exclude_file(file_info.name) or file_info.is_dir:
+                    continue
+
+                # Skip large files without downloading them
+                if file_info.size > _MAX_STATE_FILE_SIZE:
+                    logger.debug(f"Skipping large file: {file_info.name}")
                     continue
 
+                to_read.append(file_info)
+
+            # Fetch files in a few size-bounded round-trips; whatever a batch
+            # misses is downloaded per file, concurrently but bounded to spare
+            # the sandbox
+            batches, batch, batch_size = [], [], 0
+            for file_info in to_read:
+                if batch and (
+                    batch_size + file_info.size > _MAX_BATCH_SIZE
+                    or len(batch) >= _MAX_BATCH_FILES
+                ):
+                    batches.append(batch)
+                    batch, batch_size = [], 0
+                batch.append(file_info.name)
+                batch_size += file_info.size
+            if batch:
+                batches.append(batch)
+
+            contents = {}
+            for batch in batches:
                 try:
-                    full_path = f"{self.workspace_path}/{rel_path}"
-                    content = self.sandbox.fs.download_file(full_path).decode()
-                    files_state[rel_path] = {
-                        "content": content,
-                        "is_dir": file_info.is_dir,
-                        "size": file_info.size,
-                        "modified": file_info.mod_time,
-                    }
+                    contents.update(await self._download_files_batched(batch))
                 except Exception as e:
-                    print(f"Error reading file {rel_path}: {e}")
-                except UnicodeDecodeError:
-                    print(f"Skipping binary file: {rel_path}")
-
-            return files_state
+                    logger.warning(
+                        f"Batched download failed, reading {len(batch)} files one by one: {e}"
+                    )
+            results = await asyncio.gather(
+                *(read_file(f, contents.get(f.name)) for f in to_read)
+            )
+            return {
+                file_info.name: state
+                for file_info, state in zip(to_read, results)
+                if state is not None
+            }
 
         except Exception as e:
-            print(f"Error getting workspace state: {str(e)}")
+            logger.error(f"Error getting workspace state: {str(e)}")
             return {}
 
     async def execute(
@@ -155,7 +241,8 @@ class SandboxFilesTool(SandboxToolsBase):
         Returns:
             ToolResult with the operation's output or error
         """
-        async with asyncio.Lock():
+        # Serialize operations on the same file; different files proceed in parallel
+        async with self._get_lock(self.clean_path(file_path or "")):
             try:
                 # File creation
                 if action == "create_file":
@@ -200,6 +287,25 @@ class SandboxFilesTool(SandboxToolsBase):
                 logger.error(f"Error executing file action: {e}")
                 return self.fail_response(f"Error executing file action: {e}")
 
+    async def _maybe_append_preview(self, message: str, file_path: str) -> str:
+        """Append the 8080 server URL to the message for a root index.html"""
+        if file_path.lower() != "index.html":
+            return message
+        if self._preview_url is None:
+            try:
+                website_link = await asyncio.to_thread(
+                    self.sandbox.get_preview_link, 8080
+                )
+                self._preview_url = getattr(website_link, "url", None) or str(
+                    website_link
+                )
+            except Exception as e:
+                logger.warning(f"Failed to get website URL for index.html: {str(e)}")
+                return message
+        message += f"\n\n[Auto-detected index.html - HTTP server available at: {self._preview_url}]"
+        message += "\n[Note: Use the provided HTTP server URL above instead of starting a new server]"
+        return message
+
     async def _create_file(
         self, file_path: str, file_contents: str, permissions: str = "644"
     ) -> ToolResult:
@@ -210,38 +316,33 @@ class SandboxFilesTool(SandboxToolsBase):
 
             file_path = self.clean_path(file_path)
             full_path = f"{self.workspace_path}/{file_path}"
-            if self._file_exists(full_path):
+
+            # Create parent directories and make sure the file does not exist yet,
+            # in one round-trip
+            parent_dir = posixpath.dirname(full_path)
+            response = await asyncio.to_thread(
+                self.sandbox.process.exec,
+                f"mkdir -p -m 755 {shlex.quote(parent_dir)}"
+                f" && if [ -e {shlex.quote(full_path)} ]; then echo exists; fi",
+            )
+            if response.exit_code != 0:
+                raise RuntimeError(response.result)
+            if response.result.strip() == "exists":
                 return self.fail_response(
                     f"File '{file_path}' already exists. Use full_file_rewrite to modify existing files."
                 )
 
-            # Create parent directories if needed
-            parent_dir = "/".join(full_path.split("/")[:-1])
-            if parent_dir:
-                self.sandbox.fs.create_folder(parent_dir, "755")
-
             # Write the file content
-            self.sandbox.fs.upload_file(file_contents.encode(), full_path)
-            self.sandbox.fs.set_file_permissions(full_path, permissions)
+            await asyncio.to_thread(
+                self.sandbox.fs.upload_file, file_contents.encode(), full_path
+            )
+            await asyncio.to_thread(
+                self.sandbox.fs.set_file_permissions, full_path, permissions
+            )
 
             message = f"File '{file_path}' created successfully."
 
-            # Check if index.html was created and add 8080 server info (only in root workspace)
-            if file_path.lower() == "index.html":
-                try:
-                    website_link = self.sandbox.get_preview_link(8080)
-                    website_url = (
-                        website_link.url
-                        if hasattr(website_link, "url")
-                        else str(website_link).split("url='")[1].split("'")[0]
-                    )
-                    message += f"\n\n[Auto-detected index.html - HTTP server available at: {website_url}]"
-                    message += "\n[Note: Use the provided HTTP server URL above instead of starting a new server]"
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to get website URL for index.html: {str(e)}"
-                    )
-
+            message = await self._maybe_append_preview(message, file_path)
             return self.success_response(message)
         except Exception as e:
             return self.fail_response(f"Error creating file: {str(e)}")
@@ -256,17 +357,23 @@ class SandboxFilesTool(SandboxToolsBase):
 
             file_path = self.clean_path(file_path)
             full_path = f"{self.workspace_path}/{file_path}"
-            if not self._file_exists(full_path):
-                return self.fail_response(f"File '{file_path}' does not exist")
-
-            content = self.sandbox.fs.download_file(full_path).decode()
+            try:
+                data = await asyncio.to_thread(self.sandbox.fs.download_file, full_path)
+            except Exception as e:
+                if _is_not_found(e):
+                    return self.fail_response(f"File '{file_path}' does not exist")
+                raise
+            content = data.decode()
             old_str = old_str.expandtabs()
             new_str = new_str.expandtabs()
 
-            occurrences = content.count(old_str)
-            if occurrences == 0:
+            # Find the first match and make sure there is no second one; the
+            # full scan for line numbers only happens in the error case
+            start = content.find(old_str)
+            if start == -1:
                 return self.fail_response(f"String '{old_str}' not found in file")
-            if occurrences > 1:
+            end = start + len(old_str)
+            if content.find(old_str, end) != -1:
                 lines = [
                     i + 1
                     for i, line in enumerate(content.split("\n"))
@@ -277,14 +384,10 @@ class SandboxFilesTool(SandboxToolsBase):
                 )
 
             # Perform replacement
-            new_content = content.replace(old_str, new_str)
-            self.sandbox.fs.upload_file(new_content.encode(), full_path)
-
-            # Show snippet around the edit
-            replacement_line = content.split(old_str)[0].count("\n")
-            start_line = max(0, replacement_line - self.SNIPPET_LINES)
-            end_line = replacement_line + self.SNIPPET_LINES + new_str.count("\n")
-            snippet = "\n".join(new_content.split("\n")[start_line : end_line + 1])
+            new_content = content[:start] + new_str + content[end:]
+            await asyncio.to_thread(
+                self.sandbox.fs.upload_file, new_content.encode(), full_path
+            )
 
             message = f"Replacement successful."
 
@@ -303,32 +406,25 @@ class SandboxFilesTool(SandboxToolsBase):
 
             file_path = self.clean_path(file_path)
             full_path = f"{self.workspace_path}/{file_path}"
-            if not self._file_exists(full_path):
-                return self.fail_response(
-                    f"File '{file_path}' does not exist. Use create_file to create a new file."
-                )
-
-            self.sandbox.fs.upload_file(file_contents.encode(), full_path)
-            self.sandbox.fs.set_file_permissions(full_path, permissions)
+            # Uploading would silently create a missing file, so check first
+            try:
+                await asyncio.to_thread(self.sandbox.fs.get_file_info, full_path)
+            except Exception as e:
+                if _is_not_found(e):
+                    return self.fail_response(
+                        f"File '{file_path}' does not exist. Use create_file to create a new file."
+                    )
+                raise
+            await asyncio.to_thread(
+                self.sandbox.fs.upload_file, file_contents.encode(), full_path
+            )
+            await asyncio.to_thread(
+                self.sandbox.fs.set_file_permissions, full_path, permissions
+            )
 
             message = f"File '{file_path}' completely rewritten successfully."
 
-            # Check if index.html was rewritten and add 8080 server info (only in root workspace)
-            if file_path.lower() == "index.html":
-                try:
-                    website_link = self.sandbox.get_preview_link(8080)
-                    website_url = (
-                        website_link.url
-                        if hasattr(website_link, "url")
-                        else str(website_link).split("url='")[1].split("'")[0]
-                    )
-                    message += f"\n\n[Auto-detected index.html - HTTP server available at: {website_url}]"
-                    message += "\n[Note: Use the provided HTTP server URL above instead of starting a new server]"
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to get website URL for index.html: {str(e)}"
-                    )
-
+            message = await self._maybe_append_preview(message, file_path)
             return self.success_response(message)
         except Exception as e:
             return self.fail_response(f"Error rewriting file: {str(e)}")
@@ -341,10 +437,12 @@ class SandboxFilesTool(SandboxToolsBase):
 
             file_path = self.clean_path(file_path)
             full_path = f"{self.workspace_path}/{file_path}"
-            if not self._file_exists(full_path):
-                return self.fail_response(f"File '{file_path}' does not exist")
-
-            self.sandbox.fs.delete_file(full_path)
+            try:
+                await asyncio.to_thread(self.sandbox.fs.delete_file, full_path)
+            except Exception as e:
+                if _is_not_found(e):
+                    return self.fail_response(f"File '{file_path}' does not exist")
+                raise
             return self.success_response(f"File '{file_path}' deleted successfully.")
         except Exception as e:
             return self.fail_response(f"Error deleting file: {str(e)}")
@@ -1,13 +1,45 @@
 import asyncio
-import time
+import re
+import shlex
+from contextlib import nullcontext
 from typing import Any, Dict, Optional, TypeVar
 from uuid import uuid4
 
+from app.daytona.sandbox import SessionExecuteRequest
 from app.daytona.tool_base import Sandbox, SandboxToolsBase
 from app.tool.base import ToolResult
 from app.utils.logger import logger
 
 Context = TypeVar("Context")
+# Prompt characters or messages suggesting a command has finished
+_COMPLETION_RE = re.compile(r"[$#>]|Done|Completed|Finished|✓")
+
+# tmux command lines; every placeholder must be filled with shell-quoted values
+_TMUX_KILL = "tmux kill-session -t {session}"
+# Run the command, then signal the channel a blocking caller waits on. The
+# command sits alone on its line inside a group, so a trailing "&" or "# ..."
+# cannot swallow or break the signal
+_TMUX_SIGNAL = "{{ {command}\n}}; tmux wait-for -S {channel}"
+# Create the session unless it exists, then type the command into it
+_TMUX_SEND = (
+    "tmux has-session -t {session} 2>/dev/null"
+    " || tmux new-session -d -s {session}; "
+    "tmux send-keys -t {session} {keys} Enter"
+)
+# Wait for the signal, capture and kill; the last output line is the wait status
+_TMUX_WAIT = (
+    "timeout {timeout} tmux wait-for {channel}; rc=$?; "
+    "tmux capture-pane -t {session} -p -S - -E -; "
+    "tmux kill-session -t {session}; echo $rc"
+)
+# Capture the pane (and optionally kill), or report a missing session
+_TMUX_CAPTURE = (
+    "if tmux has-session -t {session} 2>/dev/null; then"
+    " tmux capture-pane -t {session} -p -S - -E -{kill};"
+    " else echo 'not_exists'; fi"
+)
+_TMUX_TERMINATE = "tmux kill-session -t {session} 2>/dev/null || echo 'not_exists'"
+
 _SHELL_DESCRIPTION = """\
 在 workspace 目录中执行 shell 命令。
 重要：默认以非阻塞方式运行，并在 tmux 会话中执行。
@@ -88,7 +120,7 @@ class SandboxShellTool(SandboxToolsBase):
             session_id = str(uuid4())
             try:
                 await self._ensure_sandbox()  # Ensure sandbox is initialized
-                self.sandbox.process.create_session(session_id)
+                await asyncio.to_thread(self.sandbox.process.create_session, session_id)
                 self._sessions[session_name] = session_id
             except Exception as e:
                 raise RuntimeError(f"Failed to create session: {str(e)}")
@@ -99,32 +131,43 @@ class SandboxShellTool(SandboxToolsBase):
         if session_name in self._sessions:
             try:
                 await self._ensure_sandbox()  # Ensure sandbox is initialized
-                self.sandbox.process.delete_session(self._sessions[session_name])
+                await asyncio.to_thread(
+                    self.sandbox.process.delete_session, self._sessions[session_name]
+                )
                 del self._sessions[session_name]
             except Exception as e:
                 print(f"Warning: Failed to cleanup session {session_name}: {str(e)}")
 
-    async def _execute_raw_command(self, command: str) -> Dict[str, Any]:
+    async def _execute_raw_command(
+        self, command: str, timeout: int = 30
+    ) -> Dict[str, Any]:
         """Execute a raw command directly in the sandbox."""
         # Ensure session exists for raw commands
         session_id = await self._ensure_session("raw_commands")
 
         # Execute command in session
-        from app.daytona.sandbox import SessionExecuteRequest
-
         req = SessionExecuteRequest(
             command=command, run_async=False, cwd=self.workspace_path
         )
 
-        response = self.sandbox.process.execute_session_command(
+        # The SDK is synchronous and a blocking wait can take the whole timeout,
+        # so keep these calls off the event loop
+        response = await asyncio.to_thread(
+            self.sandbox.process.execute_session_command,
             session_id=session_id,
             req=req,
-            timeout=30,  # Short timeout for utility commands
+            timeout=timeout,  # Short by default, for utility commands
         )
 
-        logs = self.sandbox.process.get_session_command_logs(
-            session_id=session_id, command_id=response.cmd_id
-        )
+        # Synchronous commands carry their output in the response on current SDK
+        # versions; only older ones need a separate round-trip for the logs
+        logs = getattr(response, "output", None)
+        if logs is None:
+            logs = await asyncio.to_thread(
+                self.sandbox.process.get_session_command_logs,
+                session_id=session_id,
+                command_id=response.cmd_id,
+            )
 
         return {"output": logs, "exit_code": response.exit_code}
 
@@ -150,80 +193,49 @@ class SandboxShellTool(SandboxToolsBase):
             if not session_name:
                 session_name = f"session_{str(uuid4())[:8]}"
 
-            # Check if tmux session already exists
-            check_session = await self._execute_raw_command(
-                f"tmux has-session -t {session_name} 2>/dev/null || echo 'not_exists'"
-            )
-            session_exists = "not_exists" not in check_session.get("output", "")
-
-            if not session_exists:
-                # Create a new tmux session
-                await self._execute_raw_command(
-                    f"tmux new-session -d -s {session_name}"
-                )
-
             # Ensure we're in the correct directory and send command to tmux
-            full_command = f"cd {cwd} && {command}"
-            wrapped_command = full_command.replace('"', '\\"')  # Escape double quotes
+            # Everything interpolated into a shell command line is quoted
+            session = shlex.quote(session_name)
+            full_command = f"cd {shlex.quote(cwd)} && {command}"
+            if blocking:
+                # Signal a tmux channel once the command returns, so we can wait
+                # for it in a single round-trip instead of polling the pane
+                channel = shlex.quote(f"{session_name}_done")
+                full_command = _TMUX_SIGNAL.format(
+                    command=full_command, channel=channel
+                )
 
-            # Send command to tmux session
+            # Create the tmux session unless it already exists and send the
+            # command to it, in one round-trip
             await self._execute_raw_command(
-                f'tmux send-keys -t {session_name} "{wrapped_command}" Enter'
+                _TMUX_SEND.format(session=session, keys=shlex.quote(full_command))
             )
 
             if blocking:
-                # For blocking execution, wait and capture output
-                start_time = time.time()
-                while (time.time() - start_time) < timeout:
-                    # Wait a bit before checking
-                    time.sleep(2)
-
-                    # Check if session still exists (command might have exited)
-                    check_result = await self._execute_raw_command(
-                        f"tmux has-session -t {session_name} 2>/dev/null || echo 'ended'"
-                    )
-                    if "ended" in check_result.get("output", ""):
-                        break
-
-                    # Get current output and check for common completion indicators
-                    output_result = await self._execute_raw_command(
-                        f"tmux capture-pane -t {session_name} -p -S - -E -"
-                    )
-                    current_output = output_result.get("output", "")
-
-                    # Check for prompt indicators that suggest command completion
-                    last_lines = current_output.split("\n")[-3:]
-                    completion_indicators = [
-                        "$",
-                        "#",
-                        ">",
-                        "Done",
-                        "Completed",
-                        "Finished",
-                        "✓",
-                    ]
-                    if any(
-                        indicator in line
-                        for indicator in completion_indicators
-                        for line in last_lines
-                    ):
-                        break
-
-                # Capture final output
+                # Wait for completion (bounded by timeout), capture the output and
+                # kill the session in one command; the last line is the wait status
                 output_result = await self._execute_raw_command(
-                    f"tmux capture-pane -t {session_name} -p -S - -E -"
+                    _TMUX_WAIT.format(
+                        session=session, channel=channel, timeout=timeout
+                    ),
+                    timeout=timeout + 30,
                 )
-                final_output = output_result.get("output", "")
-
-                # Kill the session after capture
-                await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+                final_output, _, wait_status = (
+                    output_result.get("output", "").rstrip("\n").rpartition("\n")
+                )
+                completed = wait_status == "0"
+                if not completed:
+                    # Interactive commands never signal; fall back to looking for a
+                    # prompt or a completion message at the end of the pane
+                    last_lines = final_output.rsplit("\n", 3)[-3:]
+                    completed = bool(_COMPLETION_RE.search("\n".join(last_lines)))
 
                 return self.success_response(
                     {
                         "output": final_output,
                         "session_name": session_name,
                         "cwd": cwd,
-                        "completed": True,
+                        "completed": completed,
                     }
                 )
             else:
@@ -242,7 +254,7 @@ class SandboxShellTool(SandboxToolsBase):
             if session_name:
                 try:
                     await self._execute_raw_command(
-                        f"tmux kill-session -t {session_name}"
+                        _TMUX_KILL.format(session=shlex.quote(session_name))
                     )
                 except:
                     pass
@@ -255,24 +267,20 @@ class SandboxShellTool(SandboxToolsBase):
             # Ensure sandbox is initialized
             await self._ensure_sandbox()
 
-            # Check if session exists
-            check_result = await self._execute_raw_command(
-                f"tmux has-session -t {session_name} 2>/dev/null || echo 'not_exists'"
+            # Check the session, get output from its pane and kill it if
+            # requested, all in one command
+            session = shlex.quote(session_name)
+            kill = "; " + _TMUX_KILL.format(session=session) if kill_session else ""
+            output_result = await self._execute_raw_command(
+                _TMUX_CAPTURE.format(session=session, kill=kill)
             )
-            if "not_exists" in check_result.get("output", ""):
+            output = output_result.get("output", "")
+            if output.strip() == "not_exists":
                 return self.fail_response(
                     f"Tmux session '{session_name}' does not exist."
                 )
 
-            # Get output from tmux pane
-            output_result = await self._execute_raw_command(
-                f"tmux capture-pane -t {session_name} -p -S - -E -"
-            )
-            output = output_result.get("output", "")
-
-            # Kill session if requested
             if kill_session:
-                await self._execute_raw_command(f"tmux kill-session -t {session_name}")
                 termination_status = "Session terminated."
             else:
                 termination_status = "Session still running."
@@ -293,18 +301,15 @@ class SandboxShellTool(SandboxToolsBase):
             # Ensure sandbox is initialized
             await self._ensure_sandbox()
 
-            # Check if session exists
-            check_result = await self._execute_raw_command(
-                f"tmux has-session -t {session_name} 2>/dev/null || echo 'not_exists'"
+            # Kill the session; this fails only if it does not exist
+            result = await self._execute_raw_command(
+                _TMUX_TERMINATE.format(session=shlex.quote(session_name))
             )
-            if "not_exists" in check_result.get("output", ""):
+            if "not_exists" in result.get("output", ""):
                 return self.fail_response(
                     f"Tmux session '{session_name}' does not exist."
                 )
 
-            # Kill the session
-            await self._execute_raw_command(f"tmux kill-session -t {session_name}")
-
             return self.success_response(
                 {"message": f"Tmux session '{session_name}' terminated successfully."}
             )
@@ -370,7 +375,10 @@ class SandboxShellTool(SandboxToolsBase):
         Returns:
             ToolResult with the action's output or error
         """
-        async with asyncio.Lock():
+        # Serialize commands sent to the same tmux session; a new random session
+        # (no session_name) cannot collide with anything
+        lock = self._get_lock(session_name) if session_name else nullcontext()
+        async with lock:
             try:
                 # Navigation actions
                 if action == "execute_command":
@@ -401,12 +409,24 @@ class SandboxShellTool(SandboxToolsBase):
 
     async def cleanup(self):
         """Clean up all sessions."""
-        for session_name in list(self._sessions.keys()):
-            await self._cleanup_session(session_name)
+        if self._sandbox is None:
+            # Never used: don't start a sandbox just to clean it up
+            return
 
-        # Also clean up any tmux sessions
         try:
-            await self._ensure_sandbox()
-            await self._execute_raw_command("tmux kill-server 2>/dev/null || true")
-        except Exception as e:
-            logger.error(f"Error shell box cleanup action: {e}")
+            # Kill all tmux sessions at once; this goes through the raw commands
+            # session, so do it before the sandbox sessions are deleted
+            try:
+                await self._ensure_sandbox()
+                await self._execute_raw_command("tmux kill-server 2>/dev/null || true")
+            except Exception as e:
+                logger.error(f"Error shell box cleanup action: {e}")
+
+            await asyncio.gather(
+                *(self._cleanup_session(name) for name in list(self._sessions))
+            )
+        finally:
+            # The sandbox may be deleted right after this; forget it so a second
+            # cleanup is a no-op instead of opening sessions on a dead sandbox
+            self._sandbox = None
+            self._sessions.clear()
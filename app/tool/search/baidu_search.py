@@ -1,4 +1,4 @@
-from typing import List
+from typing import Any, Iterator, List
 
 from baidusearch.baidusearch import search
 
@@ -14,41 +14,49 @@ class BaiduSearchEngine(WebSearchEngine):
 
         Returns results formatted according to SearchItem model.
         """
+        return list(self.iter_search(query, num_results=num_results))
+
+    def iter_search(self, query: str, num_results: int = 10) -> Iterator[SearchItem]:
+        """
+        Yield Baidu results one at a time as they are converted.
+
+        Callers that only need the first few results can stop early (e.g. with
+        itertools.islice) without converting the rest.
+        """
         raw_results = search(query, num_results=num_results)
 
         # Convert raw results to SearchItem format
-        results = []
+        to_item = self._to_search_item
         for i, item in enumerate(raw_results):
-            if isinstance(item, str):
-                # If it's just a URL
-                results.append(
-                    SearchItem(title=f"Baidu Result {i+1}", url=item, description=None)
-                )
-            elif isinstance(item, dict):
-                # If it's a dictionary with details
-                results.append(
-                    SearchItem(
-                        title=item.get("title", f"Baidu Result {i+1}"),
-                        url=item.get("url", ""),
-                        description=item.get("abstract", None),
-                    )
-                )
-            else:
-                # Try to get attributes directly
-                try:
-                    results.append(
-                        SearchItem(
-                            title=getattr(item, "title", f"Baidu Result {i+1}"),
-                            url=getattr(item, "url", ""),
-                            description=getattr(item, "abstract", None),
-                        )
-                    )
-                except Exception:
-                    # Fallback to a basic result
-                    results.append(
-                        SearchItem(
-                            title=f"Baidu Result {i+1}", url=str(item), description=None
-                        )
-                    )
-
-        return results
+            yield to_item(i, item)
+
+    @staticmethod
+    def _to_search_item(index: int, item: Any) -> SearchItem:
+        """Convert one raw Baidu result (URL, dict or object) into a SearchItem."""
+        # URLs and dicts come straight from baidusearch as plain strings, so
+        # skip pydantic validation for them; arbitrary objects still get it
+        if isinstance(item, str):
+            # If it's just a URL
+            return SearchItem.model_construct(
+                title=f"Baidu Result {index + 1}", url=item, description=None
+            )
+        if isinstance(item, dict):
+            # If it's a dictionary with details
+            get = item.get
+            return SearchItem.model_construct(
+                title=get("title", f"Baidu Result {index + 1}"),
+                url=get("url", ""),
+                description=get("abstract"),
+            )
+        # Try to get attributes directly
+        try:
+            return SearchItem(
+                title=getattr(item, "title", f"Baidu Result {index + 1}"),
+                url=getattr(item, "url", ""),
+                description=getattr(item, "abstract", None),
+            )
+        except Exception:
+            # Fallback to a basic result
+            return SearchItem(
+                title=f"Baidu Result {index + 1}", url=str(item), description=None
+            )
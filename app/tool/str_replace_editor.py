@@ -1,8 +1,9 @@
 """File and directory manipulation tool with sandbox support."""
 
+import stat
 from collections import defaultdict
 from pathlib import Path
-from typing import Any, DefaultDict, List, Literal, Optional, get_args
+from typing import Any, DefaultDict, List, Literal, NamedTuple, Optional, get_args
 
 from app.config import config
 from app.exceptions import ToolError
@@ -47,6 +48,19 @@ Notes for using the `str_replace` command:
 """
 
 
+class _Edit(NamedTuple):
+    """An edit to undo: `old` at `offset` was replaced with `new`."""
+
+    offset: int
+    old: str
+    new: str
+
+
+def _expand_tabs(text: str) -> str:
+    """expandtabs, skipping the full copy when the text has no tabs."""
+    return text.expandtabs() if "\t" in text else text
+
+
 def maybe_truncate(
     content: str, truncate_after: Optional[int] = MAX_RESPONSE_LEN
 ) -> str:
@@ -56,6 +70,21 @@ def maybe_truncate(
     return content[:truncate_after] + TRUNCATED_MESSAGE
 
 
+def _snippet_around(text: str, start: int, length: int, lines_before: int) -> str:
+    """Cut the lines around text[start:start + length], with `lines_before` lines
+    above it and up to SNIPPET_LINES below, without splitting the whole text."""
+    snippet_start = start
+    for _ in range(lines_before + 1):
+        snippet_start = text.rfind("\n", 0, snippet_start)
+    snippet_end = start + length - 1
+    for _ in range(SNIPPET_LINES + 1):
+        snippet_end = text.find("\n", snippet_end + 1)
+        if snippet_end == -1:
+            snippet_end = len(text)
+            break
+    return text[snippet_start + 1 : snippet_end]
+
+
 class StrReplaceEditor(BaseTool):
     """A tool for viewing, creating, and editing files with sandbox support."""
 
@@ -97,7 +126,7 @@ class StrReplaceEditor(BaseTool):
         },
         "required": ["command", "path"],
     }
-    _file_history: DefaultDict[PathLike, List[str]] = defaultdict(list)
+    _file_history: DefaultDict[PathLike, List[_Edit]] = defaultdict(list)
     _local_operator: LocalFileOperator = LocalFileOperator()
     _sandbox_operator: SandboxFileOperator = SandboxFileOperator()
 
@@ -127,16 +156,17 @@ class StrReplaceEditor(BaseTool):
         operator = self._get_operator()
 
         # Validate path and command combination
-        await self.validate_path(command, Path(path), operator)
+        is_dir = await self.validate_path(command, Path(path), operator)
 
         # Execute the appropriate command
         if command == "view":
-            result = await self.view(path, view_range, operator)
+            result = await self.view(path, view_range, operator, is_dir=is_dir)
         elif command == "create":
             if file_text is None:
                 raise ToolError("Parameter `file_text` is required for command: create")
             await operator.write_file(path, file_text)
-            self._file_history[path].append(file_text)
+            # Nothing to revert to; undo leaves the created file as is
+            self._file_history[path].append(_Edit(0, "", ""))
             result = ToolResult(output=f"File created successfully at: {path}")
         elif command == "str_replace":
             if old_str is None:
@@ -164,43 +194,51 @@ class StrReplaceEditor(BaseTool):
 
     async def validate_path(
         self, command: str, path: Path, operator: FileOperator
-    ) -> None:
-        """Validate path and command combination based on execution environment."""
+    ) -> bool:
+        """Validate path and command combination based on execution environment.
+
+        Returns whether the path is a directory, so callers need not ask again.
+        """
         # Check if path is absolute
         if not path.is_absolute():
             raise ToolError(f"The path {path} is not an absolute path")
 
+        # One stat answers both "does it exist" and "is it a directory"
+        st = await operator.stat(path)
+
         # Only check if path exists for non-create commands
         if command != "create":
-            if not await operator.exists(path):
+            if st is None:
                 raise ToolError(
                     f"The path {path} does not exist. Please provide a valid path."
                 )
 
             # Check if path is a directory
-            is_dir = await operator.is_directory(path)
+            is_dir = stat.S_ISDIR(st.st_mode)
             if is_dir and command != "view":
                 raise ToolError(
                     f"The path {path} is a directory and only the `view` command can be used on directories"
                 )
+            return is_dir
 
         # Check if file exists for create command
-        elif command == "create":
-            exists = await operator.exists(path)
-            if exists:
-                raise ToolError(
-                    f"File already exists at: {path}. Cannot overwrite files using command `create`."
-                )
+        elif st is not None:
+            raise ToolError(
+                f"File already exists at: {path}. Cannot overwrite files using command `create`."
+            )
+        return False
 
     async def view(
         self,
         path: PathLike,
         view_range: Optional[List[int]] = None,
         operator: FileOperator = None,
+        is_dir: Optional[bool] = None,
     ) -> CLIResult:
         """Display file or directory content."""
-        # Determine if path is a directory
-        is_dir = await operator.is_directory(path)
+        # Determine if path is a directory, unless validation already did
+        if is_dir is None:
+            is_dir = await operator.is_directory(path)
 
         if is_dir:
             # Directory handling
@@ -217,18 +255,17 @@ class StrReplaceEditor(BaseTool):
     @staticmethod
     async def _view_directory(path: PathLike, operator: FileOperator) -> CLIResult:
         """Display directory contents."""
-        find_cmd = f"find {path} -maxdepth 2 -not -path '*/\\.*'"
-
-        # Execute command using the operator
-        returncode, stdout, stderr = await operator.run_command(find_cmd)
+        try:
+            listing = await operator.list_tree(path, maxdepth=2, exclude_hidden=True)
+        except ToolError as e:
+            return CLIResult(output="", error=str(e))
 
-        if not stderr:
-            stdout = (
+        return CLIResult(
+            output=(
                 f"Here's the files and directories up to 2 levels deep in {path}, "
-                f"excluding hidden items:\n{stdout}\n"
+                f"excluding hidden items:\n{listing}\n"
             )
-
-        return CLIResult(output=stdout, error=stderr)
+        )
 
     async def _view_file(
         self,
@@ -289,17 +326,18 @@ class StrReplaceEditor(BaseTool):
     ) -> CLIResult:
         """Replace a unique string in a file with a new string."""
         # Read file content and expand tabs
-        file_content = (await operator.read_file(path)).expandtabs()
-        old_str = old_str.expandtabs()
-        new_str = new_str.expandtabs() if new_str is not None else ""
+        file_content = _expand_tabs(await operator.read_file(path))
+        old_str = _expand_tabs(old_str)
+        new_str = _expand_tabs(new_str) if new_str is not None else ""
 
         # Check if old_str is unique in the file
-        occurrences = file_content.count(old_str)
-        if occurrences == 0:
+        start = file_content.find(old_str)
+        end = start + len(old_str)
+        if start == -1:
             raise ToolError(
                 f"No replacement was performed, old_str `{old_str}` did not appear verbatim in {path}."
             )
-        elif occurrences > 1:
+        elif file_content.find(old_str, end) != -1:
             # Find line numbers of occurrences
             file_content_lines = file_content.split("\n")
             lines = [
@@ -313,19 +351,21 @@ class StrReplaceEditor(BaseTool):
             )
 
         # Replace old_str with new_str
-        new_file_content = file_content.replace(old_str, new_str)
+        new_file_content = file_content[:start] + new_str + file_content[end:]
 
         # Write the new content to the file
         await operator.write_file(path, new_file_content)
 
-        # Save the original content to history
-        self._file_history[path].append(file_content)
+        # Save the replaced span to history
+        self._file_history[path].append(_Edit(start, old_str, new_str))
 
-        # Create a snippet of the edited section
-        replacement_line = file_content.split(old_str)[0].count("\n")
+        # Create a snippet of the edited section, walking line boundaries around
+        # the edit instead of splitting the whole file
+        replacement_line = file_content.count("\n", 0, start)
         start_line = max(0, replacement_line - SNIPPET_LINES)
-        end_line = replacement_line + SNIPPET_LINES + new_str.count("\n")
-        snippet = "\n".join(new_file_content.split("\n")[start_line : end_line + 1])
+        snippet = _snippet_around(
+            new_file_content, start, len(new_str), replacement_line - start_line
+        )
 
         # Prepare the success message
         success_msg = f"The file {path} has been edited. "
@@ -345,10 +385,9 @@ class StrReplaceEditor(BaseTool):
     ) -> CLIResult:
         """Insert text at a specific line in a file."""
         # Read and prepare content
-        file_text = (await operator.read_file(path)).expandtabs()
-        new_str = new_str.expandtabs()
-        file_text_lines = file_text.split("\n")
-        n_lines_file = len(file_text_lines)
+        file_text = _expand_tabs(await operator.read_file(path))
+        new_str = _expand_tabs(new_str)
+        n_lines_file = file_text.count("\n") + 1
 
         # Validate insert_line
         if insert_line < 0 or insert_line > n_lines_file:
@@ -357,27 +396,30 @@ class StrReplaceEditor(BaseTool):
                 f"the range of lines of the file: {[0, n_lines_file]}"
             )
 
-        # Perform insertion
-        new_str_lines = new_str.split("\n")
-        new_file_text_lines = (
-            file_text_lines[:insert_line]
-            + new_str_lines
-            + file_text_lines[insert_line:]
-        )
+        # Perform insertion at the start of line `insert_line`, found by offset
+        # rather than splitting the file into lines
+        if insert_line == 0:
+            start = 0
+            edit = _Edit(0, "", new_str + "\n")
+            new_file_text = new_str + "\n" + file_text
+        else:
+            offset = -1
+            for _ in range(insert_line):
+                offset = file_text.find("\n", offset + 1)
+                if offset == -1:
+                    offset = len(file_text)
+                    break
+            start = offset + 1
+            edit = _Edit(offset, "", "\n" + new_str)
+            new_file_text = file_text[:offset] + "\n" + new_str + file_text[offset:]
 
         # Create a snippet for preview
-        snippet_lines = (
-            file_text_lines[max(0, insert_line - SNIPPET_LINES) : insert_line]
-            + new_str_lines
-            + file_text_lines[insert_line : insert_line + SNIPPET_LINES]
+        snippet = _snippet_around(
+            new_file_text, start, len(new_str), min(insert_line, SNIPPET_LINES)
         )
 
-        # Join lines and write to file
-        new_file_text = "\n".join(new_file_text_lines)
-        snippet = "\n".join(snippet_lines)
-
         await operator.write_file(path, new_file_text)
-        self._file_history[path].append(file_text)
+        self._file_history[path].append(edit)
 
         # Prepare success message
         success_msg = f"The file {path} has been edited. "
@@ -397,8 +439,17 @@ class StrReplaceEditor(BaseTool):
         if not self._file_history[path]:
             raise ToolError(f"No edit history found for {path}.")
 
-        old_text = self._file_history[path].pop()
+        # Put the old span back, provided the edited one is still in place
+        edit = self._file_history[path][-1]
+        file_text = await operator.read_file(path)
+        edit_end = edit.offset + len(edit.new)
+        if file_text[edit.offset : edit_end] != edit.new:
+            raise ToolError(
+                f"Cannot undo the last edit to {path}: the file has been modified since."
+            )
+        old_text = file_text[: edit.offset] + edit.old + file_text[edit_end:]
         await operator.write_file(path, old_text)
+        self._file_history[path].pop()
 
         return CLIResult(
             output=f"Last edit to {path} undone successfully. {self._make_output(old_text, str(path))}"
@@ -412,9 +463,10 @@ class StrReplaceEditor(BaseTool):
         expand_tabs: bool = True,
     ) -> str:
         """Format file content for display with line numbers."""
+        # Truncate first so only the shown part has its tabs expanded
         file_content = maybe_truncate(file_content)
         if expand_tabs:
-            file_content = file_content.expandtabs()
+            file_content = _expand_tabs(file_content)
 
         # Add line numbers to each line
         file_content = "\n".join(
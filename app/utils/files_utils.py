@@ -1,36 +1,48 @@
-import os
+import re
 
 
 # Files to exclude from operations
-EXCLUDED_FILES = {
-    ".DS_Store",
-    ".gitignore",
-    "package-lock.json",
-    "postcss.config.js",
-    "postcss.config.mjs",
-    "jsconfig.json",
-    "components.json",
-    "tsconfig.tsbuildinfo",
-    "tsconfig.json",
-}
+EXCLUDED_FILES = frozenset(
+    {
+        ".DS_Store",
+        ".gitignore",
+        "package-lock.json",
+        "postcss.config.js",
+        "postcss.config.mjs",
+        "jsconfig.json",
+        "components.json",
+        "tsconfig.tsbuildinfo",
+        "tsconfig.json",
+    }
+)
 
 # Directories to exclude from operations
-EXCLUDED_DIRS = {"node_modules", ".next", "dist", "build", ".git"}
+EXCLUDED_DIRS = frozenset({"node_modules", ".next", "dist", "build", ".git"})
 
 # File extensions to exclude from operations
-EXCLUDED_EXT = {
-    ".ico",
-    ".svg",
-    ".png",
-    ".jpg",
-    ".jpeg",
-    ".gif",
-    ".bmp",
-    ".tiff",
-    ".webp",
-    ".db",
-    ".sql",
-}
+EXCLUDED_EXT = frozenset(
+    {
+        ".ico",
+        ".svg",
+        ".png",
+        ".jpg",
+        ".jpeg",
+        ".gif",
+        ".bmp",
+        ".tiff",
+        ".webp",
+        ".db",
+        ".sql",
+    }
+)
+
+# Suffix tuple for a single C-level str.endswith check
+_EXCLUDED_EXT_SUFFIXES = tuple(EXCLUDED_EXT)
+
+# Matches any excluded directory as a whole path component
+_EXCLUDED_DIR_RE = re.compile(
+    r"(?:^|/)(?:%s)(?:/|$)" % "|".join(map(re.escape, sorted(EXCLUDED_DIRS)))
+)
 
 
 def should_exclude_file(rel_path: str) -> bool:
@@ -43,18 +55,19 @@ def should_exclude_file(rel_path: str) -> bool:
         True if the file should be excluded, False otherwise
     """
     # Check filename
-    filename = os.path.basename(rel_path)
+    slash = rel_path.rfind("/")
+    filename = rel_path[slash + 1 :]
     if filename in EXCLUDED_FILES:
         return True
 
-    # Check directory
-    dir_path = os.path.dirname(rel_path)
-    if any(excluded in dir_path for excluded in EXCLUDED_DIRS):
+    # Check directory components
+    if slash > 0 and _EXCLUDED_DIR_RE.search(rel_path, 0, slash):
         return True
 
-    # Check extension
-    _, ext = os.path.splitext(filename)
-    if ext.lower() in EXCLUDED_EXT:
+    # Check extension; as with os.path.splitext, leading dots do not start an
+    # extension, so ".db" and "..db" have none
+    name = filename.lstrip(".")
+    if "." in name and name.lower().endswith(_EXCLUDED_EXT_SUFFIXES):
         return True
 
     return False
@@ -70,18 +83,10 @@ def clean_path(path: str, workspace_path: str = "/workspace") -> str:
     Returns:
         The cleaned path, relative to the workspace
     """
-    # Remove any leading slash
-    path = path.lstrip("/")
-
-    # Remove workspace prefix if present
-    if path.startswith(workspace_path.lstrip("/")):
-        path = path[len(workspace_path.lstrip("/")) :]
-
-    # Remove workspace/ prefix if present
-    if path.startswith("workspace/"):
-        path = path[9:]
+    # Remove any leading slash, then the workspace prefix and a literal
+    # workspace/ prefix if present
+    path = path.lstrip("/").removeprefix(workspace_path.lstrip("/"))
+    path = path.removeprefix("workspace/")
 
     # Remove any remaining leading slash
-    path = path.lstrip("/")
-
-    return path
+    return path.lstrip("/")
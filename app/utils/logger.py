@@ -5,6 +5,8 @@ import structlog
 
 
 ENV_MODE = os.getenv("ENV_MODE", "LOCAL")
+# Records below this level are dropped before any processing
+LOG_LEVEL = getattr(logging, os.getenv("LOG_LEVEL", "DEBUG").upper(), logging.DEBUG)
 
 renderer = [structlog.processors.JSONRenderer()]
 if ENV_MODE.lower() == "local".lower():
@@ -26,6 +28,7 @@ structlog.configure(
         structlog.contextvars.merge_contextvars,
         *renderer,
     ],
+    wrapper_class=structlog.make_filtering_bound_logger(LOG_LEVEL),
     cache_logger_on_first_use=True,
 )
 
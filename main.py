@@ -1,36 +1,18 @@
-import argparse
-import asyncio
+from app.cli.entrypoint import run
 
-from app.agent.manus import Manus
-from app.logger import logger
 
-
-async def main():
-    # Parse command line arguments
-    parser = argparse.ArgumentParser(description="Run Manus agent with a prompt")
-    parser.add_argument(
-        "--prompt", type=str, required=False, help="Input prompt for the agent"
+def main():
+    run(
+        "app.agent.manus:Manus",
+        messages={
+            "prompt": "请输入你的提示: ",
+            "empty": "提供的提示为空。",
+            "processing": "正在处理你的请求...",
+            "completed": "请求处理完成。",
+            "interrupted": "操作已中断。",
+        },
     )
-    args = parser.parse_args()
-
-    # Create and initialize Manus agent
-    agent = await Manus.create()
-    try:
-        # Use command line prompt if provided, otherwise ask for input
-        prompt = args.prompt if args.prompt else input("请输入你的提示: ")
-        if not prompt.strip():
-            logger.warning("提供的提示为空。")
-            return
-
-        logger.warning("正在处理你的请求...")
-        await agent.run(prompt)
-        logger.info("请求处理完成。")
-    except KeyboardInterrupt:
-        logger.warning("操作已中断。")
-    finally:
-        # Ensure agent resources are cleaned up before exiting
-        await agent.cleanup()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
@@ -9,12 +9,9 @@ import pytest_asyncio
 from app.sandbox.core.manager import SandboxManager
 
 
-@pytest_asyncio.fixture(scope="function")
-async def manager() -> AsyncGenerator[SandboxManager, None]:
-    """Creates a sandbox manager instance.
-
-    Uses function scope to ensure each test case has its own manager instance.
-    """
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def shared_manager() -> AsyncGenerator[SandboxManager, None]:
+    """Creates a sandbox manager instance shared by all tests in this module."""
     manager = SandboxManager(max_sandboxes=2, idle_timeout=60, cleanup_interval=30)
     try:
         yield manager
@@ -23,6 +20,20 @@ async def manager() -> AsyncGenerator[SandboxManager, None]:
         await manager.cleanup()
 
 
+@pytest_asyncio.fixture(loop_scope="module")
+async def manager(shared_manager) -> AsyncGenerator[SandboxManager, None]:
+    """Hands each test the shared manager in a clean state.
+
+    Sandboxes left behind are deleted and settings a test changed are restored.
+    """
+    await shared_manager.reset()
+    idle_timeout = shared_manager.idle_timeout
+    try:
+        yield shared_manager
+    finally:
+        shared_manager.idle_timeout = idle_timeout
+
+
 @pytest.fixture
 def temp_file():
     """Creates a temporary test file."""
@@ -36,7 +47,7 @@ def temp_file():
             os.unlink(path)
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_create_sandbox(manager):
     """Tests sandbox creation."""
     # Create default sandbox
@@ -50,15 +61,15 @@ async def test_create_sandbox(manager):
     assert result.strip() == "test"
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_max_sandboxes_limit(manager):
     """Tests maximum sandbox limit enforcement."""
     created_sandboxes = []
     try:
         # Create maximum number of sandboxes
-        for _ in range(manager.max_sandboxes):
-            sandbox_id = await manager.create_sandbox()
-            created_sandboxes.append(sandbox_id)
+        created_sandboxes = await asyncio.gather(
+            *(manager.create_sandbox() for _ in range(manager.max_sandboxes))
+        )
 
         # Verify created sandbox count
         assert len(manager._sandboxes) == manager.max_sandboxes
@@ -74,22 +85,24 @@ async def test_max_sandboxes_limit(manager):
         assert str(exc_info.value) == expected_message
 
     finally:
-        # Clean up all created sandboxes
-        for sandbox_id in created_sandboxes:
-            try:
-                await manager.delete_sandbox(sandbox_id)
-            except Exception as e:
-                print(f"Failed to cleanup sandbox {sandbox_id}: {e}")
+        # Clean up all created sandboxes concurrently
+        results = await asyncio.gather(
+            *(manager.delete_sandbox(sandbox_id) for sandbox_id in created_sandboxes),
+            return_exceptions=True,
+        )
+        for sandbox_id, result in zip(created_sandboxes, results):
+            if isinstance(result, Exception):
+                print(f"Failed to cleanup sandbox {sandbox_id}: {result}")
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_get_nonexistent_sandbox(manager):
     """Tests retrieving a non-existent sandbox."""
     with pytest.raises(KeyError, match="Sandbox .* not found"):
         await manager.get_sandbox("nonexistent-id")
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_sandbox_cleanup(manager):
     """Tests sandbox cleanup functionality."""
     sandbox_id = await manager.create_sandbox()
@@ -100,31 +113,27 @@ async def test_sandbox_cleanup(manager):
     assert sandbox_id not in manager._last_used
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_idle_sandbox_cleanup(manager):
     """Tests automatic cleanup of idle sandboxes."""
-    # Set short idle timeout
-    manager.idle_timeout = 0.1
+    # With a negative idle timeout every sandbox counts as idle straight away,
+    # so there is no need to sleep before the cleanup pass
+    manager.idle_timeout = -1
 
     sandbox_id = await manager.create_sandbox()
     assert sandbox_id in manager._sandboxes
 
-    # Wait longer than idle timeout
-    await asyncio.sleep(0.2)
-
     # Trigger cleanup
     await manager._cleanup_idle_sandboxes()
     assert sandbox_id not in manager._sandboxes
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_manager_cleanup(manager):
     """Tests manager cleanup functionality."""
     # Create multiple sandboxes
-    sandbox_ids = []
-    for _ in range(2):
-        sandbox_id = await manager.create_sandbox()
-        sandbox_ids.append(sandbox_id)
+    sandbox_ids = await asyncio.gather(*(manager.create_sandbox() for _ in range(2)))
+    assert all(sandbox_id in manager._sandboxes for sandbox_id in sandbox_ids)
 
     # Clean up all resources
     await manager.cleanup()
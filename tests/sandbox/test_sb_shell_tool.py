@@ -0,0 +1,44 @@
+"""Tests for the shell command lines SandboxShellTool sends to tmux."""
+
+import os
+import subprocess
+
+import pytest
+
+from app.tool.sandbox.sb_shell_tool import _TMUX_SIGNAL
+
+
+@pytest.fixture
+def fake_tmux(tmp_path):
+    """Puts a tmux stand-in on PATH that records the arguments it is called with."""
+    calls = tmp_path / "tmux_calls"
+    tmux = tmp_path / "tmux"
+    tmux.write_text(f'#!/bin/sh\necho "$@" >> {calls}\n')
+    tmux.chmod(0o755)
+    return tmp_path, calls
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        "echo ran",
+        "echo ran;",
+        "echo ran &",
+        "echo ran # trailing comment",
+    ],
+)
+def test_signal_runs_after_command(fake_tmux, command):
+    """The completion signal must survive trailing '&', ';' and comments."""
+    bin_dir, calls = fake_tmux
+    script = _TMUX_SIGNAL.format(command=command, channel="done")
+    result = subprocess.run(
+        ["bash", "-c", script],
+        env={**os.environ, "PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}"},
+        capture_output=True,
+        text=True,
+        timeout=10,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "ran"
+    assert calls.read_text() == "wait-for -S done\n"
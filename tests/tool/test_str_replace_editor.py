@@ -0,0 +1,131 @@
+"""Tests for StrReplaceEditor against the local file operator."""
+
+from pathlib import Path
+
+import pytest
+
+from app.exceptions import ToolError
+from app.tool.str_replace_editor import StrReplaceEditor
+
+
+@pytest.fixture
+def editor() -> StrReplaceEditor:
+    return StrReplaceEditor()
+
+
+@pytest.fixture
+def sample(tmp_path: Path) -> Path:
+    path = tmp_path / "sample.txt"
+    path.write_text("one\ntwo\nthree\n")
+    return path
+
+
+@pytest.mark.asyncio
+async def test_undo_after_several_edits(editor: StrReplaceEditor, sample: Path):
+    """Each undo reverts one edit, newest first, back to the original text."""
+    path = str(sample)
+    snapshots = [sample.read_text()]
+    await editor.execute(
+        command="str_replace", path=path, old_str="two", new_str="TWO\n2"
+    )
+    snapshots.append(sample.read_text())
+    await editor.execute(command="insert", path=path, insert_line=1, new_str="1.5")
+    snapshots.append(sample.read_text())
+    await editor.execute(command="str_replace", path=path, old_str="one\n")
+    snapshots.append(sample.read_text())
+    assert sample.read_text() == "1.5\nTWO\n2\nthree\n"
+
+    for expected in reversed(snapshots[:-1]):
+        await editor.execute(command="undo_edit", path=path)
+        assert sample.read_text() == expected
+
+    with pytest.raises(ToolError, match="No edit history"):
+        await editor.execute(command="undo_edit", path=path)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "insert_line, expected",
+    [
+        (0, "new\none\ntwo\nthree\n"),
+        (3, "one\ntwo\nthree\nnew\n"),
+        # The trailing newline ends line 3, so the last line is the empty line 4
+        (4, "one\ntwo\nthree\n\nnew"),
+    ],
+)
+async def test_insert_at_boundaries(
+    editor: StrReplaceEditor, sample: Path, insert_line: int, expected: str
+):
+    original = sample.read_text()
+    await editor.execute(
+        command="insert", path=str(sample), insert_line=insert_line, new_str="new"
+    )
+    assert sample.read_text() == expected
+
+    await editor.execute(command="undo_edit", path=str(sample))
+    assert sample.read_text() == original
+
+
+@pytest.mark.asyncio
+async def test_insert_past_eof(editor: StrReplaceEditor, sample: Path):
+    with pytest.raises(ToolError, match="Invalid `insert_line`"):
+        await editor.execute(
+            command="insert", path=str(sample), insert_line=5, new_str="new"
+        )
+
+
+@pytest.mark.asyncio
+async def test_create_then_undo(editor: StrReplaceEditor, tmp_path: Path):
+    """Undoing a create keeps the file, and edits after it still undo."""
+    path = tmp_path / "created.txt"
+    await editor.execute(command="create", path=str(path), file_text="alpha\n")
+    await editor.execute(
+        command="str_replace", path=str(path), old_str="alpha", new_str="beta"
+    )
+
+    await editor.execute(command="undo_edit", path=str(path))
+    assert path.read_text() == "alpha\n"
+    await editor.execute(command="undo_edit", path=str(path))
+    assert path.read_text() == "alpha\n"
+
+    with pytest.raises(ToolError, match="already exists"):
+        await editor.execute(command="create", path=str(path), file_text="")
+
+
+@pytest.mark.asyncio
+async def test_undo_refuses_changed_file(editor: StrReplaceEditor, sample: Path):
+    await editor.execute(
+        command="str_replace", path=str(sample), old_str="two", new_str="TWO"
+    )
+    sample.write_text("rewritten elsewhere\n")
+
+    with pytest.raises(ToolError, match="modified since"):
+        await editor.execute(command="undo_edit", path=str(sample))
+    assert sample.read_text() == "rewritten elsewhere\n"
+
+
+@pytest.mark.asyncio
+async def test_view_directory(editor: StrReplaceEditor, tmp_path: Path):
+    """Lists two levels deep and leaves out hidden entries."""
+    (tmp_path / "a" / "b" / "c").mkdir(parents=True)
+    (tmp_path / "a" / "file.txt").write_text("")
+    (tmp_path / "a" / "b" / "c" / "deep.txt").write_text("")
+    (tmp_path / ".hidden").mkdir()
+    (tmp_path / ".hidden" / "inside.txt").write_text("")
+    (tmp_path / "a" / ".secret").write_text("")
+
+    output = await editor.execute(command="view", path=str(tmp_path))
+    listed = set(output.splitlines()[1:])
+
+    assert {
+        str(tmp_path),
+        str(tmp_path / "a"),
+        str(tmp_path / "a" / "file.txt"),
+        str(tmp_path / "a" / "b"),
+    } <= listed
+    assert str(tmp_path / "a" / "b" / "c") not in listed
+    assert not any("deep.txt" in line for line in listed)
+    assert not any(".hidden" in line or ".secret" in line for line in listed)
+
+    with pytest.raises(ToolError, match="not allowed"):
+        await editor.execute(command="view", path=str(tmp_path), view_range=[1, 2])
@@ -0,0 +1,22 @@
+"""Tests for the workspace file exclusion rules."""
+
+import pytest
+
+from app.utils.files_utils import should_exclude_file
+
+
+@pytest.mark.parametrize(
+    "rel_path",
+    ["a.db", "src/x.PNG", "src/.a.db", "dist/bundle.js", "package-lock.json"],
+)
+def test_excluded(rel_path):
+    assert should_exclude_file(rel_path)
+
+
+@pytest.mark.parametrize(
+    "rel_path",
+    # Leading dots do not start an extension, matching os.path.splitext
+    ["src/.db", "src/..db", "src/app.py", "README.md", "src/db"],
+)
+def test_not_excluded(rel_path):
+    assert not should_exclude_file(rel_path)